@@ -14,30 +14,153 @@ Why separate from endpoints?
 - Easy to see all registered routes in one place
 """
 
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+import httpx
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+
+# Logging setup (before importing the modules that log)
+# - LOG_LEVEL=DEBUG shows the per-request details, INFO (default) keeps the hot path quiet
+# - Format keeps the familiar "[module] message" style
+# - Handlers only put the record on a queue; a background thread (QueueListener)
+#   does the actual formatting + writing, so a request never waits on stdout
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("[%(name)s] %(levelname)s %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+# QueueHandler.prepare() already formats the record into its message (that's how
+# args/tracebacks cross the thread). It must only render the bare message -
+# basicConfig's default format here would get the stream's format wrapped around it
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+_log_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    handlers=[_log_handler]
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flush what's still queued on shutdown
+
+logger = logging.getLogger(__name__)
 
 # Import routers from endpoints
 # Each endpoint file exports a 'router' object
 from endpoints.systemHealth import router as health_router
 from endpoints.brainDump import router as brain_dump_router
 from endpoints.user_onboarding import router as onboarding_router
+from tools.database.supabase_client import get_supabase
+from tools.google_calendar.calendar_client import start_token_refresher, stop_token_refresher
 
 # Create the FastAPI application
 # - title: Shows in the auto-generated docs at /docs
 # - version: API version (good practice for versioning)
+# - default_response_class: serialize responses with orjson (much faster than stdlib json)
 app = FastAPI(
     title="Brain Dump API",
     version="0.1.0",
-    description="Server-centric voice-to-action system"
+    description="Server-centric voice-to-action system",
+    default_response_class=ORJSONResponse
 )
 
-from fastapi.staticfiles import StaticFiles
-import os
+# Compress larger responses (e.g. /brain-dump replies carrying execution results)
+# - minimum_size: tiny JSON replies aren't worth the CPU, send them as-is
+# - compresslevel: 4 is most of gzip's size win at a fraction of level 9's CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
 
-# Mount static files (CSS, JS)
+from fastapi import Request, Response
+import hashlib
+import mimetypes
+
+# Static files (CSS, JS)
+# - In production behind Nginx (see nginx.conf), set SERVE_STATIC_IN_APP=0:
+#   Nginx serves /static from disk and Python never sees those requests
+# - Default (dev / Render without Nginx): serve them from the app
+#
+# The files are tiny and never change while the process runs, so we read them
+# ONCE at startup and serve them from memory: no stat/open/read per request.
 current_dir = os.path.dirname(os.path.abspath(__file__))
 static_dir = os.path.join(current_dir, "static")
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
+
+# url path (e.g. "style.css") -> (body, media_type, etag)
+_STATIC_CACHE: dict = {}
+_STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _load_static_cache():
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            full_path = os.path.join(root, name)
+            url_path = os.path.relpath(full_path, static_dir).replace(os.sep, "/")
+            with open(full_path, "rb") as f:
+                body = f.read()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            _STATIC_CACHE[url_path] = (body, media_type, etag)
+    logger.info("Preloaded %d static file(s) into memory", len(_STATIC_CACHE))
+
+
+if os.getenv("SERVE_STATIC_IN_APP", "1") == "1":
+
+    @app.on_event("startup")
+    async def _preload_static():
+        _load_static_cache()
+
+    @app.get("/static/{path:path}", include_in_schema=False)
+    async def static_file(path: str, request: Request):
+        entry = _STATIC_CACHE.get(path)
+        if entry is None:
+            return Response(status_code=404)
+
+        body, media_type, etag = entry
+        headers = {"ETag": etag, "Cache-Control": _STATIC_CACHE_CONTROL}
+
+        # Client already has this exact version -> no body needed
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type=media_type, headers=headers)
+
+@app.on_event("startup")
+async def _warmup():
+    """
+    Open the Supabase connection (DNS + TCP + TLS) before the first real request,
+    so the first /brain-dump after a cold start doesn't pay for it.
+    
+    A neutral one-row read - not a user lookup, which would log a fake device
+    and leave it in the "unknown device" cache.
+    """
+    supabase = get_supabase()
+    if supabase is None:
+        return
+    try:
+        await supabase.get("/users", params={"limit": 1, "select": "user_id"})
+    except httpx.HTTPError as e:
+        logger.warning("Supabase warm-up failed: %s", e)
+
+
+@app.on_event("startup")
+async def _start_calendar_token_refresh():
+    """
+    Fetch the Google access token once at startup and keep it fresh from then on,
+    so no request ever waits on a token refresh. Without credentials (local dev)
+    the app still starts - Calendar actions then fail on their own as before.
+    """
+    try:
+        await asyncio.to_thread(start_token_refresher)
+    except Exception as e:
+        logger.warning("Calendar token refresh not started: %s", e)
+
+
+@app.on_event("shutdown")
+async def _stop_calendar_token_refresh():
+    stop_token_refresher()
+
 
 # Register routers
 # - Each router handles a group of related endpoints
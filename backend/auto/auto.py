@@ -42,9 +42,22 @@ Bad:     classify_text_with_openai() → business logic, belongs in agent_proces
 """
 
 import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 
+# Snapshot of os.environ, taken once .env has been loaded.
+# Reading a plain dict is cheaper than going through os.environ on every call,
+# and the environment does not change while the server is running.
+_ENV_CACHE: dict = {}
+
+# Pre-resolved at import time (see refresh_env_cache)
+OPENAI_API_KEY: Optional[str] = None
+
+
 def get_env_variable(key: str, default: Optional[str] = None, required: bool = False) -> Optional[str]:
     """
     Get an environment variable value.
@@ -69,7 +82,7 @@ def get_env_variable(key: str, default: Optional[str] = None, required: bool = F
         >>> get_env_variable("OPTIONAL_SETTING", default="fallback")
         "fallback"
     """
-    value = os.getenv(key, default)
+    value = _ENV_CACHE.get(key, default)
     
     if required and value is None:
         raise ValueError(
@@ -99,8 +112,23 @@ def get_openai_api_key() -> Optional[str]:
         - Returns None if not found (graceful degradation)
         - Does NOT call OpenAI
         - Does NOT throw errors (lets caller decide what to do)
+        - Resolved once when the env cache is built, not on every call
     """
-    return get_env_variable("OPENAI_API_KEY", default=None, required=False)
+    return OPENAI_API_KEY
+
+
+def refresh_env_cache():
+    """
+    Re-snapshot os.environ into the env cache.
+    
+    Called automatically by load_env_file(). Tests that patch os.environ
+    should call this afterwards so get_env_variable() sees the new values.
+    """
+    global OPENAI_API_KEY
+    
+    _ENV_CACHE.clear()
+    _ENV_CACHE.update(os.environ)
+    OPENAI_API_KEY = _ENV_CACHE.get("OPENAI_API_KEY")
 
 
 def load_env_file():
@@ -116,6 +144,7 @@ def load_env_file():
         - Uses python-dotenv library (install: pip install python-dotenv)
         - Safe to call multiple times
         - Fails silently if .env doesn't exist (production uses real env vars)
+        - Rebuilds the env cache afterwards
         
     Example .env file:
         OPENAI_API_KEY=sk-proj-...
@@ -132,6 +161,47 @@ def load_env_file():
     except Exception as e:
         # .env file might not exist - that's OK
         print(f"[auto.py] Note: Could not load .env file: {e}")
+    
+    refresh_env_cache()
+
+
+# =============================================================================
+# REQUEST-SCOPED CONTEXT
+# =============================================================================
+
+# "Now" for the request being processed, as epoch nanoseconds (time.time_ns()).
+# Set by the endpoint, read by the agent when it builds the prompt.
+# A ContextVar (unlike os.environ) is private to each request, so concurrent
+# requests can't overwrite each other's time.
+CURRENT_TIME_CONTEXT: ContextVar[Optional[int]] = ContextVar("current_time_context", default=None)
+
+
+def current_epoch_ns() -> int:
+    """
+    Current time as an int (epoch nanoseconds).
+    
+    A single cheap call with no datetime allocation: use it wherever "now" is only
+    stored or compared, and format it (format_time_context) only where a human/LLM reads it.
+    """
+    return time.time_ns()
+
+
+@lru_cache(maxsize=1)
+def _format_epoch_second(epoch_s: int) -> str:
+    return datetime.fromtimestamp(epoch_s).isoformat(timespec="seconds")
+
+
+def format_time_context(epoch_ns: int) -> str:
+    """
+    Format an epoch-ns timestamp as local ISO 8601 (second precision).
+    
+    Memoized per second: requests arriving within the same second share one string.
+    
+    Example:
+        >>> format_time_context(current_epoch_ns())
+        "2026-02-10T16:00:05"
+    """
+    return _format_epoch_second(epoch_ns // 1_000_000_000)
 
 
 # Auto-load .env when this module is imported
@@ -4,46 +4,91 @@ curd/user_details.py - User Verification & Management
 RESPONSIBILITY:
 - Verify if a user is registered
 - Register new users
-- Manage user data (in-memory for Step 5)
+- Manage user data (stored in the Supabase `users` table)
 
 WHY THIS FILE EXISTS:
 - Separation of concerns: endpoints shouldn't know HOW users are stored
 - Single source of truth for user identity
 
-CURRENT STATE (Step 5):
-- In-memory dictionary `users_db` replacing the stub
-- Registration logic added
-- verify_user now checks existence
+CURRENT STATE:
+- Supabase `users` table (user_id = phone, device_id = Shortcut's technical ID)
+- All reads go through one helper: _select_users()
+
+ASYNC:
+- All lookups are `async def` and talk to Supabase (PostgREST) over a shared
+  httpx.AsyncClient, so the event loop keeps serving other requests meanwhile
+
+CACHING:
+- User rows are cached in memory for 60 seconds (per worker)
+- "No such device" is cached too, but only for 5 seconds: an unregistered
+  Shortcut that keeps retrying costs one lookup, yet a device that just
+  registered (possibly on another worker) is recognized almost immediately
+- register_user() invalidates the cached entries it overwrites
 
 FUTURE ENHANCEMENTS:
-- Database lookup (Supabase)
 - Token management
 """
 
+import logging
 from typing import Optional, Dict
-from tools.database.supabase_client import supabase
 
-def verify_user(device_id: str) -> bool:
+import httpx
+import orjson
+from tools.database.supabase_client import get_supabase
+from tools.cache.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Cached user rows, keyed two ways:
+# - by the technical Device ID (what the Shortcut sends)
+# - by the Phone Number (our primary user_id)
+_USER_BY_DEVICE = TTLCache(maxsize=10_000, ttl=60)
+_USER_BY_ID = TTLCache(maxsize=10_000, ttl=60)
+
+# Negative cache: Device IDs that matched no user (short TTL, see CACHING above)
+_UNKNOWN_DEVICES = TTLCache(maxsize=10_000, ttl=5)
+
+
+def _cache_user(user: dict, device_id: Optional[str] = None) -> None:
+    """Store a user row under every key it can be looked up by."""
+    _USER_BY_ID.set(user["user_id"], user)
+    if user.get("device_id"):
+        _USER_BY_DEVICE.set(user["device_id"], user)
+    if device_id:
+        _USER_BY_DEVICE.set(device_id, user)
+
+
+async def _select_users(filters: dict) -> list:
     """
-    Verify that the DEVICE is registered to a user with calendar enabled.
+    SELECT * FROM users WHERE <filters>, via PostgREST.
+    
+    Args:
+        filters (dict): PostgREST query params, e.g. {"user_id": "eq.0501234567"}
+        
+    Raises:
+        httpx.HTTPError / ValueError: callers decide how to degrade
     """
-    if not supabase: return False
+    response = await get_supabase().get("/users", params={"select": "*", **filters})
+    response.raise_for_status()
+    return orjson.loads(response.content)  # orjson.JSONDecodeError is a ValueError
 
-    try:
-        response = supabase.table("users").select("calendar_enabled").eq("device_id", device_id).execute()
-        if response.data and len(response.data) > 0:
-            return response.data[0].get("calendar_enabled", False)
-        return False
-    except:
-        return False
+
+def _quote(value: str) -> str:
+    """Quote a value for a PostgREST or=(...) filter (commas/parens are syntax there)."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
 
 
-def register_user(user_data: dict) -> dict:
+async def register_user(user_data: dict) -> dict:
     """
     Register or update a user record.
     user_id = Phone Number
     device_id = Technical ID from Shortcut
+    
+    Raises:
+        httpx.HTTPError: the upsert failed - the caller must not report success
     """
+    supabase = get_supabase()
     if not supabase:
         raise Exception("Supabase client not initialized")
 
@@ -56,51 +101,90 @@ def register_user(user_data: dict) -> dict:
     }
 
     try:
-        print(f"[user_details] Upserting Phone Identity: {record['user_id']} for Device: {record['device_id']}")
-        response = supabase.table("users").upsert(record).execute()
-        return response.data[0] if response.data else record
+        logger.info("Upserting Phone Identity: %s for Device: %s", record["user_id"], record["device_id"])
+        response = await supabase.post(
+            "/users",
+            content=orjson.dumps(record),
+            headers={
+                "Content-Type": "application/json",
+                "Prefer": "resolution=merge-duplicates,return=representation",
+            }
+        )
+        response.raise_for_status()
+        rows = orjson.loads(response.content)
+        return rows[0] if rows else record
     except Exception as e:
-        print(f"[user_details] Supabase Error: {e}")
-        return record
-
-
-def get_user_by_device(device_id: str) -> Optional[dict]:
+        logger.error("Supabase Error: %s", e)
+        raise
+    finally:
+        # Drop stale cached rows (and "unknown device" markers) only once the write is done.
+        # ❌ Before the POST: a lookup running meanwhile re-caches the old row (or
+        #    "unknown") for the full TTL.
+        # ✅ In `finally`: also when the write failed or timed out - it may still have landed.
+        # The Shortcut may send either ID, and the phone may arrive without its leading 0.
+        for key in (record["device_id"], record["user_id"], record["user_id"].lstrip("0")):
+            _USER_BY_DEVICE.pop(key, None)
+            _UNKNOWN_DEVICES.pop(key, None)
+        _USER_BY_ID.pop(record["user_id"], None)
+
+
+async def get_user_by_device(device_id: str) -> Optional[dict]:
     """
     Resolve the technical Device ID or Phone Number to a full User record.
     Built to be robust against Shortcut-side number formatting issues.
     """
-    if not supabase: return None
-    
-    # 1. Standard Lookup: By device_id (The Technical ID)
-    try:
-        response = supabase.table("users").select("*").eq("device_id", device_id).execute()
-        if response.data:
-            return response.data[0]
-    except:
-        pass
+    if not get_supabase(): return None
 
-    # 2. Smart Lookup: If it looks like a phone number missing a 0
+    cached = _USER_BY_DEVICE.get(device_id)
+    if cached is not None:
+        return cached
+    if _UNKNOWN_DEVICES.get(device_id):
+        return None
+    
+    # 1. Smart Lookup: If it looks like a phone number missing a 0
     # (9 digits starting with '5' is common for Israeli mobiles when treated as an integer)
     lookup_id = device_id
     if len(device_id) == 9 and device_id.startswith("5"):
         lookup_id = "0" + device_id
-        print(f"[user_details] ID '{device_id}' looks like a missing-zero phone. Trying '{lookup_id}'...")
+        logger.debug("ID '%s' looks like a missing-zero phone. Also trying '%s'...", device_id, lookup_id)
 
-    # 3. Fallback Lookup: By user_id (The Phone Number)
+    # 2. Single round trip: match by device_id (The Technical ID)
+    #    OR by user_id (The Phone Number)
     try:
-        response = supabase.table("users").select("*").eq("user_id", lookup_id).execute()
-        if response.data:
-            return response.data[0]
-    except:
-        pass
+        rows = await _select_users({
+            "or": f"(device_id.eq.{_quote(device_id)},user_id.eq.{_quote(lookup_id)})",
+            "limit": 2,
+        })
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Supabase lookup failed: %s", e)
+        return None
+
+    # 3. Prefer the device_id match, fall back to the phone match
+    user = next((row for row in rows if row.get("device_id") == device_id), None)
+    if user is None:
+        user = next((row for row in rows if row.get("user_id") == lookup_id), None)
 
-    return None
+    if user:
+        _cache_user(user, device_id)
+    else:
+        # Only a successful "no rows" answer is cached, never a failed lookup
+        _UNKNOWN_DEVICES.set(device_id, True)
+    return user
 
-def get_user(user_id: str) -> Optional[dict]:
+async def get_user(user_id: str) -> Optional[dict]:
     """Retrieve user details by Phone Number."""
-    if not supabase: return None
+    if not get_supabase(): return None
+
+    cached = _USER_BY_ID.get(user_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table("users").select("*").eq("user_id", user_id).execute()
-        return response.data[0] if response.data else None
-    except:
+        rows = await _select_users({"user_id": f"eq.{user_id}"})
+        if rows:
+            _cache_user(rows[0])
+            return rows[0]
+        return None
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Supabase lookup failed: %s", e)
         return None
@@ -23,24 +23,79 @@ STRICT RESPONSIBILITIES:
 ❌ NO database knowledge
 """
 
-from fastapi import APIRouter, HTTPException, Request, Body, Query
+import hashlib
+import logging
+
+from fastapi import APIRouter, Request, Body, Query
+from fastapi.responses import Response
+import orjson
 from typing import Optional
 
 # Import our Pydantic models
-from schema.brain_dump import BrainDumpRequest, BrainDumpResponse
+from schema.brain_dump import BrainDumpResponse, FlexibleBrainDumpRequest
+from pydantic import ValidationError
 
 # Import business logic
-from crud.user_details import verify_user
+from crud.user_details import get_user_by_device
 from tools.business_logic.brain_dump_flow import brain_dump_flow
+from auto.auto import CURRENT_TIME_CONTEXT, current_epoch_ns
+from tools.cache.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 # Create router for brain dump endpoints
 router = APIRouter()
 
+# Pre-serialized NEEDS_REGISTRATION reply (the path every unregistered device hits).
+# Everything but registration_url is fixed, so it's built once here; per request we
+# only append the URL: no model construction, no response_model validation.
+_NEEDS_REG_PREFIX = orjson.dumps(BrainDumpResponse(
+    success=False,
+    message="I need to know who you are to help you. Click below to register.",
+    status="NEEDS_REGISTRATION",
+    action_taken=None
+).model_dump(exclude={"registration_url"}))[:-1] + b',"registration_url":'
+
+# user_id values that mean "the Shortcut sent an empty variable", not a device ID.
+# '0' is a null 'phone' from a failed verification; the rest are how an unset
+# variable gets stringified. None of them can be registered, so there is no point
+# in looking them up: they all get the same fixed (pre-serialized) reply.
+_BAD_SENTINELS = frozenset({"0", "null", "undefined", "None"})
+
+_SENTINEL_REPLY = orjson.dumps(BrainDumpResponse(
+    success=False,
+    message="שגיאה בקיצור הדרך: ה-user_id שהתקבל הוא '0'. בקיצור הדרך שלך, בשלב של שליחת ה-Brain Dump, וודא שאתה שולח את המשתנה TechnicalID ולא את תוצאת האימות.",
+    status="NEEDS_REGISTRATION",
+    registration_url="https://brain-dump-py.onrender.com/register?user_id=Daniel_iPhone" # Fallback if they still need it
+).model_dump())
+
+# Intents whose reply is returned exactly as brain_dump_flow built it (see below)
+_CONTRACT_INTENTS = frozenset({"note", "reminder", "alarm", "shopping"})
+
+# Idempotency: iPhone Shortcuts retry on flaky cell networks ("Run again" is common).
+# A retry of the same dump within 60 seconds gets the same reply, without calling
+# OpenAI again or creating a duplicate calendar event.
+# The Shortcut sends no retry marker, so a retry is recognized by its content:
+# same resolved user (phone) + same text. Kept short on purpose - the price is
+# that saying the exact same thing twice within the window gets the first reply.
+_REPLAY_WINDOW_SECONDS = 60
+_RECENT_REPLIES = TTLCache(maxsize=10_000, ttl=_REPLAY_WINDOW_SECONDS)
+
+
+def _replay_key(user_id: str, text: str) -> str:
+    return hashlib.blake2b(f"{user_id}|{text}".encode(), digest_size=16).hexdigest()
+
+
+# Content types that carry form data (only these are worth parsing as a form)
+_FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
 
 # =============================================================================
 # ENDPOINT
-@router.post("/brain-dump", response_model=BrainDumpResponse)
-@router.get("/brain-dump", response_model=BrainDumpResponse) # Also support GET for easier testing
+# response_model=None: replies are already-serialized bytes or models we built ourselves,
+# so there is nothing to re-validate. `responses` keeps the schema in the /docs page.
+@router.post("/brain-dump", response_model=None, responses={200: {"model": BrainDumpResponse}})
+@router.get("/brain-dump", response_model=None, responses={200: {"model": BrainDumpResponse}}) # Also support GET for easier testing
 async def brain_dump(
     request: Request,
     body: Optional[dict] = Body(None),
@@ -51,108 +106,102 @@ async def brain_dump(
     Flexible Brain Dump endpoint.
     Handles data from JSON body, Form data, or Query params.
     """
-    # 1. TRIPLE FALLBACK LOGIC
+    # 1. TRIPLE FALLBACK LOGIC: JSON body > Form data > Query params
+    # FlexibleBrainDumpRequest resolves the user_id naming variations
+    # (TechnicalID / userId / user_id) and turns numeric IDs into strings.
     final_text = text
     final_user_id = user_id
 
-    # If body exists (JSON), use it
-    if body:
-        final_text = body.get("text", final_text)
-        final_user_id = body.get("user_id", final_user_id)
-        # Handle common naming variations in Shortcuts
-        final_user_id = body.get("userId", final_user_id)
-        final_user_id = body.get("TechnicalID", final_user_id)
-
-    # If still missing, check Form data
+    try:
+        # If body exists (JSON), use it
+        if body:
+            payload = FlexibleBrainDumpRequest.model_validate(body)
+            final_text = payload.text if payload.text is not None else final_text
+            final_user_id = payload.user_id if payload.user_id is not None else final_user_id
+
+        # If still missing, check Form data (only when the request actually carries a form)
+        content_type = request.headers.get("content-type", "")
+        if (not final_text or not final_user_id) and content_type.startswith(_FORM_CONTENT_TYPES):
+            payload = FlexibleBrainDumpRequest.model_validate(dict(await request.form()))
+            final_text = payload.text if payload.text is not None else final_text
+            final_user_id = payload.user_id if payload.user_id is not None else final_user_id
+    except ValidationError as e:
+        logger.warning("Could not parse request payload: %s", e)
+
+    # SPECIAL DEBUG: a sentinel user_id means the Shortcut mapping is broken.
+    # Reject it here, before validation and any Supabase lookup.
+    if final_user_id in _BAD_SENTINELS:
+        logger.warning("Received user_id='%s'. Shortcut mapping error.", final_user_id)
+        return Response(content=_SENTINEL_REPLY, media_type="application/json")
+
+    # 2. VALIDATION
     if not final_text or not final_user_id:
-        form_data = await request.form()
-        final_text = form_data.get("text", final_text)
-        final_user_id = form_data.get("user_id", final_user_id)
-
-    # 2. VALIDATION (Be specific to allow '0' as a value)
-    if final_text is None or final_text == "" or final_user_id is None or final_user_id == "":
-        print(f"[endpoint] VALIDATION FAILED: text='{final_text}', user_id='{final_user_id}' (Type: {type(final_user_id)})")
+        logger.warning("VALIDATION FAILED: text='%s', user_id='%s'", final_text, final_user_id)
         return BrainDumpResponse(
             success=False,
             message="Missing required fields: 'text' or 'user_id'. Please check your Shortcut configuration.",
             status="FAILED_VALIDATION"
         )
 
-    # Ensure user_id is a string for database lookups
-    final_user_id = str(final_user_id)
-    print(f"[endpoint] Processing request: user='{final_user_id}', text='{final_text[:20]}...' | Method: {request.method}")
+    logger.debug("Processing request: user='%s', text='%.20s...' | Method: %s", final_user_id, final_text, request.method)
 
     # Step 1: Resolve Identity (TECHNICAL ID -> PHONE NUMBER)
-    from crud.user_details import get_user_by_device
-    
-    # SPECIAL DEBUG: If user_id is "0", it means the Shortcut is passing a null 'phone' from a failed verification.
-    if final_user_id == "0":
-        print(f"[endpoint] WARNING: Received user_id='0'. Shortcut mapping error.")
-        return BrainDumpResponse(
-            success=False,
-            message="שגיאה בקיצור הדרך: ה-user_id שהתקבל הוא '0'. בקיצור הדרך שלך, בשלב של שליחת ה-Brain Dump, וודא שאתה שולח את המשתנה TechnicalID ולא את תוצאת האימות.",
-            status="NEEDS_REGISTRATION",
-            registration_url=f"https://brain-dump-py.onrender.com/register?user_id=Daniel_iPhone" # Fallback if they still need it
-        )
-
-    user_record = get_user_by_device(final_user_id)
+    # Always first: a device that was unregistered meanwhile must not get a replayed reply
+    user_record = await get_user_by_device(final_user_id)
     
     if not user_record or not user_record.get("calendar_enabled", False):
-        print(f"[endpoint] Device unrecognized or not ready: {final_user_id} -> Asking for registration")
+        logger.info("Device unrecognized or not ready: %s -> Asking for registration", final_user_id)
         reg_url = f"https://brain-dump-py.onrender.com/register?user_id={final_user_id}"
-        return BrainDumpResponse(
-            success=False,
-            message="I need to know who you are to help you. Click below to register.",
-            status="NEEDS_REGISTRATION",
-            registration_url=reg_url,
-            action_taken=None
+        return Response(
+            content=_NEEDS_REG_PREFIX + orjson.dumps(reg_url) + b"}",
+            media_type="application/json"
         )
     
     # The real User ID for the rest of the flow is the Phone Number
     real_user_id = user_record["user_id"]
 
-    # Step 2: Provide time context
-    import os
-    from datetime import datetime
-    os.environ["CURRENT_TIME_CONTEXT"] = datetime.now().isoformat()
+    # A retry of a dump we already answered? Replay the reply we sent (see _RECENT_REPLIES)
+    replay_key = _replay_key(real_user_id, final_text)
+    cached_reply = _RECENT_REPLIES.get(replay_key)
+    if cached_reply is not None:
+        logger.info("Replaying cached reply for retried dump from %s", real_user_id)
+        return Response(content=cached_reply, media_type="application/json")
+
+    # Step 2: Provide time context (scoped to this request only)
+    token = CURRENT_TIME_CONTEXT.set(current_epoch_ns())
 
     # Step 3: Call the brain dump flow
-    result = brain_dump_flow(
-        text=final_text,
-        user_id=real_user_id
-    )
-    
-    # SPECIAL HANDLING FOR NOTES (Contract Check)
-    # The notes contract requires a STRICT format without the 'success' field or others.
-    # We must bypass the standard BrainDumpResponse model.
-    if result.get("intent") == "note":
-        from fastapi.responses import JSONResponse
-        return JSONResponse(content=result)
-    
-    # SPECIAL HANDLING FOR REMINDERS (Contract Check)
-    # The reminder contract returns intent-specific fields (reminder_title, reminder_time, etc.)
-    # that BrainDumpResponse does not have. We must bypass it, same as notes.
-    if result.get("intent") == "reminder":
-        from fastapi.responses import JSONResponse
-        return JSONResponse(content=result)
-    
-    # SPECIAL HANDLING FOR ALARMS (Contract Check)
-    # The alarm contract returns alarm_iso and alarm_label.
-    if result.get("intent") == "alarm":
-        from fastapi.responses import JSONResponse
-        return JSONResponse(content=result)
-    
-    # SPECIAL HANDLING FOR SHOPPING (Contract Check)
-    # The shopping contract returns items list.
-    if result.get("intent") == "shopping":
-        from fastapi.responses import JSONResponse
-        return JSONResponse(content=result)
+    try:
+        result = await brain_dump_flow(
+            text=final_text,
+            user_id=real_user_id,
+            user=user_record
+        )
+    finally:
+        CURRENT_TIME_CONTEXT.reset(token)
     
-    # Standard response for all other flows
-    return BrainDumpResponse(
-        success=result.get("success", False), # Default to False if missing
-        message=result.get("message", ""),
-        action_taken=result.get("action_taken"),
-        status=result.get("status", "SUCCESS"),
-        actions=result.get("debug", {}).get("execution_results")
-    )
+    # SPECIAL HANDLING FOR CONTRACT INTENTS (Contract Check)
+    # note / reminder / alarm / shopping each have a STRICT contract with the Shortcut:
+    # - notes must NOT include the 'success' field or others
+    # - reminders return reminder_title / reminder_iso, alarms alarm_iso / alarm_label,
+    #   shopping an items list - fields BrainDumpResponse does not have
+    # So they bypass the standard BrainDumpResponse model and are returned as-is.
+    if result.get("intent") in _CONTRACT_INTENTS:
+        content = result
+    else:
+        # Standard response for all other flows
+        content = BrainDumpResponse(
+            success=result.get("success", False), # Default to False if missing
+            message=result.get("message", ""),
+            action_taken=result.get("action_taken"),
+            status=result.get("status", "SUCCESS"),
+            actions=result.get("debug", {}).get("execution_results")
+        ).model_dump()
+
+    body = orjson.dumps(content)
+
+    # Remember successful replies so a retry of the same dump doesn't re-run the flow
+    if result.get("status") == "SUCCESS":
+        _RECENT_REPLIES.set(replay_key, body)
+
+    return Response(content=body, media_type="application/json")
@@ -3,48 +3,52 @@ endpoints/user_onboarding.py - User Verification & Registration Routes
 
 RESPONSIBILITIES:
 - Handle /verify-user
-- Handle /register (Serve HTML)
-- Handle /register/complete
+- Handle GET /register (Serve HTML)
+- Handle POST /register (complete registration)
 
 AUTHORITY:
+- Uses schema.register for the request/response models
 - Uses crud.user_details for logic
 - Uses static files for HTML
 """
 
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, FileResponse, Response
+from typing import Optional
+import gzip
+import hashlib
+import logging
 import os
 
-from crud.user_details import verify_user, register_user
-from tools.google_calendar.calendar_client import calendar_client
+import httpx
+import orjson
 
-router = APIRouter()
-print("[onboarding] Loading Onboarding Router - Version: DEPLOY_V3_CLEAN")
-
-# -----------------------------------------------------------------------------
-# SCHEMAS (Local or imported, keeping it simple as requested)
-# -----------------------------------------------------------------------------
+from schema.register import (
+    VerifyUserRequest,
+    VerifyUserResponse,
+    RegisterCompleteRequest,
+    RegisterCompleteResponse,
+)
+from crud.user_details import register_user, get_user_by_device
+from tools.google_calendar.calendar_client import get_calendar_client
 
-class VerifyUserRequest(BaseModel):
-    user_id: str
+logger = logging.getLogger(__name__)
 
-class VerifyUserResponse(BaseModel):
-    status: str
-    phone: str = None
-    registration_url: str = None
+router = APIRouter()
 
-class RegisterCompleteRequest(BaseModel):
-    user_id: str
-    phone: str
-    email: str
-    calendar_enabled: bool
+# Pre-serialized fixed /verify-user replies: no model construction per request.
+# NEEDS_REGISTRATION only varies by URL, which is appended (JSON-escaped) per request.
+_MISSING_ID_JSON = orjson.dumps(VerifyUserResponse(status="MISSING_ID").model_dump())
+_NEEDS_REG_PREFIX = orjson.dumps(
+    VerifyUserResponse(status="NEEDS_REGISTRATION").model_dump(exclude={"registration_url"})
+)[:-1] + b',"registration_url":'
 
-class RegisterCompleteResponse(BaseModel):
-    status: str
+logger.info("Loading Onboarding Router - Version: DEPLOY_V3_CLEAN")
 
-@router.get("/verify-user", response_model=VerifyUserResponse)
-@router.post("/verify-user", response_model=VerifyUserResponse)
+# response_model=None: every reply is built by us (bytes or model_construct), so FastAPI
+# doesn't need to re-validate it. `responses` keeps the schema in the /docs page.
+@router.get("/verify-user", response_model=None, responses={200: {"model": VerifyUserResponse}})
+@router.post("/verify-user", response_model=None, responses={200: {"model": VerifyUserResponse}})
 async def verify_user_endpoint(request: Request = None, data: VerifyUserRequest = None):
     """
     Checks if a device is registered and returns the associated phone number.
@@ -58,62 +62,138 @@ async def verify_user_endpoint(request: Request = None, data: VerifyUserRequest
         device_id = request.query_params.get("user_id")
 
     if not device_id:
-        return VerifyUserResponse(status="MISSING_ID")
+        return Response(content=_MISSING_ID_JSON, media_type="application/json")
 
-    from crud.user_details import get_user_by_device
-    user = get_user_by_device(device_id)
+    user = await get_user_by_device(device_id)
     
+    # Server-built reply from known-good values -> model_construct skips validation.
+    # (Only for responses we build: incoming request models are always validated.)
     if user and user.get("calendar_enabled"):
-        return VerifyUserResponse(
+        return VerifyUserResponse.model_construct(
             status="OK",
             phone=user["user_id"] # The phone number is our primary user_id
         )
     
     # Generate a friendly registration URL for the shortcut to use directly
     reg_url = f"https://brain-dump-py.onrender.com/register?user_id={device_id}"
-    return VerifyUserResponse(status="NEEDS_REGISTRATION", registration_url=reg_url)
+    return Response(
+        content=_NEEDS_REG_PREFIX + orjson.dumps(reg_url) + b"}",
+        media_type="application/json"
+    )
 
 
-@router.get("/register", response_class=HTMLResponse)
-async def get_register_page(request: Request):
+def _load_register_page() -> Optional[bytes]:
     """
-    GET /register
-    Serves the registration HTML page.
+    Find static/register.html and read it (once, at import).
+    
+    Robust path resolution for Render/Local:
+    we look for static/register.html relative to the root or this file.
+    
+    Returns:
+        The page bytes, or None if it wasn't found anywhere
     """
-    # Robust path resolution for Render/Local
-    # We look for static/register.html relative to the root or this file
     possible_paths = [
         os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "register.html"),
         os.path.join(os.getcwd(), "static", "register.html"),
         os.path.join(os.getcwd(), "backend", "static", "register.html"),
     ]
     
-    static_file = None
     for path in possible_paths:
         if os.path.exists(path):
-            static_file = path
-            break
-            
-    if static_file:
-        print(f"[onboarding] Serving register page from: {static_file}")
-        with open(static_file, 'r', encoding='utf-8') as f:
-            return HTMLResponse(content=f.read())
-    else:
-        print(f"[onboarding] ERROR: Register page NOT FOUND. Searched in: {possible_paths}")
+            logger.info("Serving register page from: %s", path)
+            with open(path, 'rb') as f:
+                return f.read()
+    
+    logger.error("Register page NOT FOUND. Searched in: %s", possible_paths)
+    return None
+
+
+# The page never changes while the process runs -> keep it in memory
+_REGISTER_HTML = _load_register_page()
+
+# Strong ETag (content hash): a browser that already has this exact page gets a 304
+_REGISTER_ETAG = '"' + hashlib.sha256(_REGISTER_HTML).hexdigest()[:16] + '"' if _REGISTER_HTML else None
+_REGISTER_HEADERS = {"ETag": _REGISTER_ETAG, "Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
+
+# Compressed once here (max level is fine, it's a one-off) instead of on every request.
+# Different bytes -> its own ETag: a cache must never answer a gzip-less client's
+# If-None-Match with the compressed variant (or the other way around).
+# The app's GZipMiddleware leaves it alone: Starlette's GZipResponder passes through
+# any response that already carries Content-Encoding, so it isn't compressed twice.
+_REGISTER_HTML_GZ = gzip.compress(_REGISTER_HTML, 9) if _REGISTER_HTML else None
+_REGISTER_GZ_ETAG = _REGISTER_ETAG[:-1] + '-gz"' if _REGISTER_ETAG else None
+_REGISTER_GZ_HEADERS = {**_REGISTER_HEADERS, "ETag": _REGISTER_GZ_ETAG, "Content-Encoding": "gzip"}
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip, honouring q-values.
+    
+    ❌ `"gzip" in header` is also true for "gzip;q=0" - an explicit refusal.
+    ✅ gzip (or "*", if gzip isn't named) counts only with q > 0.
+    
+    Args:
+        accept_encoding: The raw header value ("" if absent)
+    
+    Returns:
+        True if the gzip variant may be sent
+    """
+    wildcard = False
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0  # unparseable -> don't assume the client wants it
+        if coding == "gzip":
+            return q > 0
+        wildcard = q > 0
+    return wildcard
+
+
+@router.get("/register", response_class=HTMLResponse)
+async def get_register_page(request: Request):
+    """
+    GET /register
+    Serves the registration HTML page (from memory, see _REGISTER_HTML).
+    """
+    if _REGISTER_HTML is None:
         return HTMLResponse(content="<h1>Error: Register page not found</h1>", status_code=404)
+    
+    # Pick the variant first - each has its own ETag
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        content, headers = _REGISTER_HTML_GZ, _REGISTER_GZ_HEADERS
+    else:
+        content, headers = _REGISTER_HTML, _REGISTER_HEADERS
+    
+    # Client already has this exact version -> no body needed
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={**_REGISTER_HEADERS, "ETag": headers["ETag"]})
+    
+    # Fresh response around the shared bytes (headers are copied, never shared between requests)
+    return HTMLResponse(content=content, headers=headers)
 
 
-@router.post("/register", response_model=RegisterCompleteResponse)
+@router.post("/register", response_model=None, responses={200: {"model": RegisterCompleteResponse}})
 async def complete_registration(request: RegisterCompleteRequest):
     """
     POST /register
     Saves the mapping between technical user_id and manual phone/email.
     """
-    # 1. Verify real access to the calendar
-    has_access = calendar_client.verify_access(request.email)
+    # 1. Verify real access to the calendar (in a thread: the Google client blocks).
+    # This must finish BEFORE we save anything: an unverified user is never written.
+    # (Recent successful checks are cached by the client: a retry skips Google.)
+    has_access = await get_calendar_client().verify_access_async(request.email)
     
     if not has_access:
-        print(f"[onboarding] Verification FAILED for {request.email}")
+        logger.warning("Verification FAILED for %s", request.email)
         raise HTTPException(
             status_code=403, 
             detail=f"We couldn't access the calendar for {request.email}. "
@@ -128,7 +208,14 @@ async def complete_registration(request: RegisterCompleteRequest):
         "calendar_enabled": request.calendar_enabled
     }
     
-    register_user(user_data)
+    try:
+        await register_user(user_data)
+    except httpx.HTTPError:
+        # Already logged by register_user - don't tell the Shortcut it worked
+        raise HTTPException(
+            status_code=502,
+            detail="We couldn't save your registration right now. Please try again."
+        )
     
-    print(f"[onboarding] User {request.user_id} registered with phone {request.phone}")
-    return RegisterCompleteResponse(status="OK")
+    logger.info("User %s registered with phone %s", request.user_id, request.phone)
+    return RegisterCompleteResponse.model_construct(status="OK")
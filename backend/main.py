@@ -10,6 +10,8 @@ Why separate from app.py?
 - main.py is only for running the server
 """
 
+import os
+
 import uvicorn
 
 # We import 'app' from app.py
@@ -17,14 +19,23 @@ import uvicorn
 from app import app
 
 if __name__ == "__main__":
+    # ENV=dev (default) -> auto-reload, anything else (e.g. ENV=prod) -> no file watcher
+    is_dev = os.getenv("ENV", "dev") == "dev"
+
     # uvicorn.run() starts the ASGI server
     # - app: the FastAPI application object
     # - host: "0.0.0.0" means listen on all network interfaces
-    # - port: 8000 is the default for development
-    # - reload: True means auto-restart when code changes (dev only!)
+    # - port: $PORT (set by Render), 8000 by default for development
+    # - reload: auto-restart when code changes (dev only! ignores `workers`)
+    # - workers: $WEB_CONCURRENCY processes in production
+    # - loop / http: "auto" picks uvloop + httptools when installed (uvicorn[standard])
     uvicorn.run(
         "app:app",  # String format allows reload to work properly
         host="0.0.0.0",
-        port=8000,
-        reload=True
+        port=int(os.getenv("PORT", "8000")),
+        reload=is_dev,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
+        log_level="info"
     )
@@ -15,7 +15,7 @@ This file contains ONLY data shapes:
 - NO external API calls
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices
 from typing import Optional
 
 
@@ -36,6 +36,26 @@ class BrainDumpRequest(BaseModel):
     user_id: str  # Identifier for user verification
 
 
+class FlexibleBrainDumpRequest(BaseModel):
+    """
+    What a Shortcut ACTUALLY sends - from a JSON body, form data, or query params.
+    
+    Differences from BrainDumpRequest:
+    - user_id accepts the naming variations Shortcuts use, in priority order:
+      TechnicalID > userId > user_id
+    - Numbers are accepted and turned into strings (some Shortcuts send user_id as 0)
+    - Both fields are optional: the endpoint answers FAILED_VALIDATION itself
+      instead of FastAPI returning a 422 the Shortcut can't display
+    """
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    text: Optional[str] = None
+    user_id: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("TechnicalID", "userId", "user_id")
+    )
+
+
 class BrainDumpResponse(BaseModel):
     """
     The response sent back to the iPhone Shortcut.
@@ -1,7 +1,8 @@
 """
 schema/register.py - User Registration Models
 
-This file defines the data shape for the /register endpoint.
+This file defines the data shapes for the onboarding endpoints
+(/verify-user and /register, see endpoints/user_onboarding.py).
 """
 
 from pydantic import BaseModel
@@ -30,13 +31,35 @@ class UserRegistrationResponse(BaseModel):
     message: str
     user_id: str
 
+
 class VerifyUserRequest(BaseModel):
-    user_id: str
+    """
+    Request body for /verify-user (POST).
+    """
+    user_id: str          # Technical ID from the Shortcut
+
 
 class VerifyUserResponse(BaseModel):
-    status: str # "OK" or "NEEDS_REGISTRATION"
+    """
+    Response for /verify-user.
+    """
+    status: str                              # "OK", "NEEDS_REGISTRATION" or "MISSING_ID"
+    phone: Optional[str] = None              # Only when status == "OK"
+    registration_url: Optional[str] = None   # Only when status == "NEEDS_REGISTRATION"
+
 
 class RegisterCompleteRequest(BaseModel):
-    user_id: str
-    email: str
+    """
+    Request body for POST /register (sent by static/register.html).
+    """
+    user_id: str          # Technical ID from the Shortcut
+    phone: str            # Manual phone from the HTML form
+    email: str            # Manual email from the HTML form
     calendar_enabled: bool
+
+
+class RegisterCompleteResponse(BaseModel):
+    """
+    Response after completing registration.
+    """
+    status: str
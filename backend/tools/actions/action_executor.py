@@ -32,8 +32,13 @@ CREATE_REMINDER   - Would set reminder
 SAVE_NOTE         - Would save note to database
 """
 
+import logging
+from typing import Optional
 
-def execute(actions: list[dict], user_id: str) -> list[dict]:
+logger = logging.getLogger(__name__)
+
+
+def execute(actions: list[dict], user_id: str, user: Optional[dict] = None) -> list[dict]:
     """
     Execute a list of actions (STUB - no real execution yet).
     
@@ -48,6 +53,8 @@ def execute(actions: list[dict], user_id: str) -> list[dict]:
                 "payload": dict   # Action-specific data
             }
         user_id (str): User identifier
+        user (Optional[dict]): The user record, already resolved by the endpoint
+            (needed by actions that write to the user's own accounts, e.g. calendar)
         
     Returns:
         list[dict]: Execution results
@@ -72,39 +79,26 @@ def execute(actions: list[dict], user_id: str) -> list[dict]:
         ]
     """
     if not actions:
-        print("[action_executor] No actions to execute")
         return []
     
-    print(f"[action_executor] Executing {len(actions)} action(s) for user: {user_id}")
-    
-    results = []
+    # One result per action, in order (size is known up front)
+    results = [None] * len(actions)
     
-    for action in actions:
-        action_type = action.get("type", "UNKNOWN")
-        payload = action.get("payload", {})
+    for i, action in enumerate(actions):
+        action_type = action.get("type") or "UNKNOWN"
+        payload = action.get("payload") or {}
         
-        print(f"[action_executor] Processing action: {action_type}")
-        
-        # Route to specific action handler (all stubs for now)
-        if action_type == "CREATE_TASK":
-            result = _execute_create_task(payload, user_id)
-        elif action_type == "CREATE_EVENT":
-            result = _execute_create_event(payload, user_id)
-        elif action_type == "CREATE_REMINDER":
-            result = _execute_create_reminder(payload, user_id)
-        elif action_type == "SAVE_NOTE":
-            result = _execute_save_note(payload, user_id)
+        # Route to the specific action handler (see _HANDLERS at the bottom)
+        handler = _HANDLERS.get(action_type)
+        if handler is not None:
+            result = handler(payload, user_id, user)
         else:
-            result = {
-                "ok": False,
-                "type": action_type,
-                "details": f"STUB: Unknown action type '{action_type}'",
-                "payload": payload
-            }
+            result = _execute_unknown(action_type, payload)
         
-        results.append(result)
-        print(f"[action_executor] Result: {result['details']}")
+        results[i] = result
+        logger.debug("%s -> %s", action_type, result["details"])
     
+    logger.debug("Processed %d action(s) for user: %s", len(actions), user_id)
     return results
 
 
@@ -112,7 +106,7 @@ def execute(actions: list[dict], user_id: str) -> list[dict]:
 # ACTION-SPECIFIC STUB EXECUTORS
 # =============================================================================
 
-def _execute_create_task(payload: dict, user_id: str) -> dict:
+def _execute_create_task(payload: dict, user_id: str, user: Optional[dict] = None) -> dict:
     """
     STUB: Would create a task in Todoist.
     
@@ -134,16 +128,14 @@ def _execute_create_task(payload: dict, user_id: str) -> dict:
     }
 
 
-def _execute_create_event(payload: dict, user_id: str) -> dict:
+def _execute_create_event(payload: dict, user_id: str, user: Optional[dict]) -> dict:
     """
     Creates a real event in Google Calendar.
     Requires the user's email to be registered in Supabase.
     """
-    from tools.google_calendar.calendar_client import calendar_client
-    from crud.user_details import get_user
+    from tools.google_calendar.calendar_client import get_calendar_client
     
-    # 1. Get user email from Supabase
-    user = get_user(user_id)
+    # 1. Get user email (from the user record resolved by the endpoint)
     if not user or not user.get("email"):
         return {
             "ok": False,
@@ -167,6 +159,17 @@ def _execute_create_event(payload: dict, user_id: str) -> dict:
         }
 
     # 2. Call the real calendar client
+    try:
+        calendar_client = get_calendar_client()
+    except Exception as e:
+        # No credentials / Google unreachable: this action fails, the flow goes on
+        logger.error("Calendar client unavailable: %s", e)
+        return {
+            "ok": False,
+            "type": "CREATE_EVENT",
+            "details": f"Failed to create event: {e}",
+            "payload": payload
+        }
     result = calendar_client.create_event(
         calendar_id=calendar_id,
         title=title,
@@ -175,6 +178,14 @@ def _execute_create_event(payload: dict, user_id: str) -> dict:
         description=description
     )
 
+    if result["ok"] and result.get("duplicate"):
+        # Same event created moments ago (a retry): nothing new was added
+        return {
+            "ok": True,
+            "type": "CREATE_EVENT",
+            "details": f"Event '{title}' was already created a moment ago - not added twice.",
+            "payload": {"event_link": result.get("link"), "duplicate": True}
+        }
     if result["ok"]:
         return {
             "ok": True,
@@ -191,7 +202,7 @@ def _execute_create_event(payload: dict, user_id: str) -> dict:
         }
 
 
-def _execute_create_reminder(payload: dict, user_id: str) -> dict:
+def _execute_create_reminder(payload: dict, user_id: str, user: Optional[dict] = None) -> dict:
     """
     STUB: Would create a reminder.
     
@@ -214,13 +225,13 @@ def _execute_create_reminder(payload: dict, user_id: str) -> dict:
     }
 
 
-def _execute_save_note(payload: dict, user_id: str) -> dict:
+def _execute_save_note(payload: dict, user_id: str, user: Optional[dict] = None) -> dict:
     """
     STUB: Would save a note to database.
     Notes are currently non-blocking and not saved to Supabase yet.
     """
     content = payload.get("content", "Empty note")
-    print(f"[action_executor] STUB: SAVE_NOTE requested for {user_id}: '{content}'")
+    logger.debug("STUB: SAVE_NOTE requested for %s: '%s'", user_id, content)
     
     return {
         "ok": True,
@@ -228,3 +239,28 @@ def _execute_save_note(payload: dict, user_id: str) -> dict:
         "details": f"STUB: SAVE_NOTE logged for {user_id}",
         "payload": payload
     }
+
+
+def _execute_unknown(action_type: str, payload: dict) -> dict:
+    """No handler registered for this action type."""
+    return {
+        "ok": False,
+        "type": action_type,
+        "details": f"STUB: Unknown action type '{action_type}'",
+        "payload": payload
+    }
+
+
+# =============================================================================
+# DISPATCH TABLE
+# =============================================================================
+# action type -> handler(payload, user_id, user)
+# One dict lookup per action instead of walking an if/elif chain.
+# New action type? Write its _execute_* function and register it here.
+
+_HANDLERS = {
+    "CREATE_TASK": _execute_create_task,
+    "CREATE_EVENT": _execute_create_event,
+    "CREATE_REMINDER": _execute_create_reminder,
+    "SAVE_NOTE": _execute_save_note,
+}
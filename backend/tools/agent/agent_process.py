@@ -20,7 +20,7 @@ This file does NOT know about:
 THE CONTRACT (IMMUTABLE)
 ═══════════════════════════════════════════════════════════════════════════════
 
-def process_text(text: str) -> dict
+async def process_text(text: str) -> dict   # awaited; the result shape below is the contract
 
 Returns ALWAYS this structure:
 {
@@ -44,12 +44,25 @@ These are the ONLY valid intents in the system.
 This is the shared language between all components.
 """
 
+import asyncio
+import logging
 import os
 import re
-from typing import Optional, Dict
+import sys
+from typing import Optional, Dict, TypedDict
+
+import orjson
+
+from auto.auto import CURRENT_TIME_CONTEXT, format_time_context, get_openai_api_key
+from tools.cache.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 # Intent categories - closed set, do not add without architectural review
-VALID_INTENTS = {
+# - frozenset: read-only, nobody can add an intent at runtime
+# - interned: the parser returns these exact string objects (see _parse_openai_response),
+#   so downstream dict lookups on the intent compare by identity first
+VALID_INTENTS = frozenset(map(sys.intern, {
     "event",     # User wants to create a calendar event (e.g., "schedule meeting tomorrow")
     "reminder",  # User wants to set a reminder or task (e.g., "remind me to call mom", "I need to fix the tap")
     "alarm",     # User wants to set an alarm (e.g., "set alarm in 17 minutes", "wake me up at 7")
@@ -57,10 +70,113 @@ VALID_INTENTS = {
     "shopping",  # User wants to add items to shopping list (e.g., "add milk and eggs to shopping list")
     "question",  # User is asking a question (e.g., "what's the weather?")
     "unknown"    # Cannot determine intent (fallback)
-}
+}))
+
+
+class IntentResult(TypedDict):
+    """
+    The contract returned by process_text() (see THE CONTRACT above).
+    
+    A TypedDict: type checkers/IDEs know the schema, while at runtime it is
+    still a plain dict (zero construction cost, and every caller that does
+    result["intent"] / result.get(...) keeps working unchanged).
+    """
+    intent: str          # One of VALID_INTENTS
+    confidence: float    # 0.0 to 1.0
+    entities: Dict[str, str]
+    original_text: str
+
+# The model used for classification (also part of the cache key below)
+OPENAI_MODEL = "gpt-4o-mini"  # Good balance of cost/speed/quality
 
+# Classification cache: voice dumps repeat a lot ("add milk", "note: ...").
+# A repeat reuses the previous answer instead of another ~1s OpenAI call.
+# "Repeat" is decided on a normalized form of the text: case, whitespace and
+# punctuation are ignored, since dictation varies exactly there
+# ("Add milk." / "add milk" / "Add milk,").
+# '?' and '!' are kept: they carry meaning - "buy milk?" is a question,
+# "buy milk" is a shopping item - and must not share an answer.
+# Fail closed - a wrong cached answer is worse than a miss, so we only cache:
+# - known intents with high confidence
+# - results WITHOUT a resolved time (start_iso/end_iso depend on "now")
+_INTENT_CACHE = TTLCache(maxsize=20_000, ttl=24 * 60 * 60)
+_CACHE_MIN_CONFIDENCE = 0.8
 
-def process_text(text: str) -> dict:
+# Single-flight: cache key -> the asyncio.Task classifying that text right now.
+# Identical dumps that arrive together (double-tapped Shortcut, a retry while
+# the first call is still running) wait for ONE OpenAI call instead of each
+# making their own.
+_IN_FLIGHT: dict = {}
+_PUNCTUATION_RE = re.compile(r"[^\w\s?!]")
+
+
+# Cheap rule-based pre-classifier: unambiguous inputs skip the LLM entirely.
+# Only intents whose decision needs NO extracted entities are listed here
+# (a note uses the text as-is). Reminders, alarms, events and shopping
+# need start_iso / items from the LLM, so they always go through OpenAI.
+# ❌ No "question word + '?'" rule: "when is my meeting with Dana tomorrow?" or
+#    "how about a reminder at 5 to call mom?" are requests to act, and the
+#    LLM routes them to event/reminder - a regex would answer "question".
+_RULES = (
+    # Explicit "note:" / "פתק:" prefix
+    (re.compile(r"^\s*(note|פתק|רשום|תרשום)\s*:", re.IGNORECASE), "note"),
+)
+_RULE_CONFIDENCE = 0.9
+
+
+def _pre_classify(text: str) -> Optional[IntentResult]:
+    """
+    Classify obvious inputs without calling OpenAI.
+    
+    Returns:
+        A result in the process_text() contract format, or None if no rule matched
+    """
+    for pattern, intent in _RULES:
+        if pattern.match(text):
+            return {
+                "intent": intent,
+                "confidence": _RULE_CONFIDENCE,
+                "entities": {},
+                "original_text": text
+            }
+    return None
+
+
+# One OpenAI client per process (created on first use, see _client)
+_OPENAI_CLIENT = None
+
+
+def _client(api_key: str):
+    """
+    Shared (async) OpenAI client.
+    
+    Building a client sets up an HTTP connection pool, TLS and retry policy;
+    reusing it keeps connections to OpenAI alive between requests.
+    Async, so a request waiting on OpenAI doesn't hold up the event loop.
+    """
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        from openai import AsyncOpenAI
+        _OPENAI_CLIENT = AsyncOpenAI(api_key=api_key)
+    return _OPENAI_CLIENT
+
+
+def _intent_cache_key(text: str) -> tuple:
+    normalized = " ".join(_PUNCTUATION_RE.sub(" ", text.lower()).split())
+    return (OPENAI_MODEL, normalized)
+
+
+def _is_cacheable(intent_result: dict) -> bool:
+    entities = intent_result["entities"]
+    return (
+        intent_result["intent"] != "unknown"
+        and intent_result["confidence"] >= _CACHE_MIN_CONFIDENCE
+        and "start_iso" not in entities
+        and "end_iso" not in entities
+    )
+
+
+async def process_text(text: str) -> IntentResult:
     """
     Process raw text and return structured intent understanding.
     
@@ -86,7 +202,7 @@ def process_text(text: str) -> dict:
             }
             
     Example:
-        >>> process_text("Add milk to shopping list")
+        >>> await process_text("Add milk to shopping list")
         {
             "intent": "task",
             "confidence": 0.95,
@@ -94,37 +210,61 @@ def process_text(text: str) -> dict:
             "original_text": "Add milk to shopping list"
         }
     """
-    from auto.auto import get_openai_api_key
+    # Obvious from the text alone? No LLM call needed.
+    ruled = _pre_classify(text)
+    if ruled is not None:
+        return ruled
+    
+    # Seen this exact utterance recently? Reuse the classification.
+    cache_key = _intent_cache_key(text)
+    cached = _INTENT_CACHE.get(cache_key)
+    if cached is not None:
+        return {**cached, "entities": dict(cached["entities"]), "original_text": text}
     
     # Get API key from infrastructure layer
     api_key = get_openai_api_key()
     
     if not api_key:
         # No API key available - graceful degradation
-        print("[agent_process] WARNING: No OpenAI API key found, falling back to unknown intent")
+        logger.warning("No OpenAI API key found, falling back to unknown intent")
         return _fallback_intent(text)
     
+    # Same utterance already being classified for another request? Share that call.
+    task = _IN_FLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_classify_with_openai(text, api_key, cache_key))
+        _IN_FLIGHT[cache_key] = task
+        task.add_done_callback(lambda _: _IN_FLIGHT.pop(cache_key, None))
+    
+    # shield: if THIS request is cancelled (client hung up), the shared call keeps going
+    intent_result = await asyncio.shield(task)
+    return {**intent_result, "entities": dict(intent_result["entities"]), "original_text": text}
+
+
+async def _classify_with_openai(text: str, api_key: str, cache_key: tuple) -> IntentResult:
+    """
+    The actual OpenAI round trip (+ storing the result in the classification cache).
+    
+    Never raises: any failure falls back to the "unknown" intent.
+    """
     try:
-        # Import OpenAI client
-        from openai import OpenAI
-        
-        # Initialize client
-        client = OpenAI(api_key=api_key)
+        client = _client(api_key)
         
         # Build the prompt
         prompt = _build_prompt(text)
         
-        print(f"[agent_process] Calling OpenAI to classify: '{text}'")
+        logger.debug("Calling OpenAI to classify: '%s'", text)
         
         # Call OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Good balance of cost/speed/quality
+        response = await client.chat.completions.create(
+            model=OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": "You are an assistant for 'Brain Dump'. You help users capture tasks, events, and notes. You MUST support both Hebrew and English. If the user speaks Hebrew, analyze the intent correctly in Hebrew."},
-                {"role": "user", "content": prompt}
+                _STATIC_SYSTEM_MSG,                  # identical every call (cacheable prefix)
+                {"role": "user", "content": prompt}  # time + text only
             ],
+            response_format={"type": "json_object"},  # always a parseable JSON object
             temperature=0.3,  # Low temperature for consistent classification
-            max_tokens=150
+            max_tokens=200
         )
         
         # Extract response
@@ -133,14 +273,18 @@ def process_text(text: str) -> dict:
         # Parse the response
         intent_result = _parse_openai_response(result_text, text)
         
-        print(f"[agent_process] OpenAI classified as: {intent_result['intent']} (confidence: {intent_result['confidence']})")
+        logger.debug("OpenAI classified as: %s (confidence: %s)",
+                     intent_result['intent'], intent_result['confidence'])
+        
+        if _is_cacheable(intent_result):
+            # Store a copy: callers are free to modify what we return
+            _INTENT_CACHE.set(cache_key, {**intent_result, "entities": dict(intent_result["entities"])})
         
         return intent_result
         
     except Exception as e:
         # Something went wrong - fallback gracefully
-        print(f"[agent_process] ERROR during OpenAI classification: {e}")
-        print(f"[agent_process] Falling back to unknown intent")
+        logger.error("OpenAI classification failed, falling back to unknown intent: %s", e)
         return _fallback_intent(text)
 
 
@@ -148,57 +292,72 @@ def process_text(text: str) -> dict:
 # PRIVATE HELPER FUNCTIONS (Phase C)
 # =============================================================================
 
+# "Now" when no request time was set (e.g. scripts/tests calling process_text directly)
+_DEFAULT_TIME_CONTEXT = "2026-01-25T21:30:00"
+
+# The instructions, identical bytes on every call.
+# Sent as the system message, so everything variable (time, user text) comes AFTER
+# it: OpenAI's prompt caching only reuses an exact prefix, and this is most of the tokens.
+_STATIC_PREFIX = """You classify messages for 'Brain Dump', an assistant that captures tasks, events and notes. Messages may be in Hebrew, English or both; understand Hebrew natively (e.g. 'מחר' = tomorrow).
+
+Intents (pick ONE):
+- event: create a calendar event ("schedule meeting tomorrow")
+- reminder: anything to remember or do, with or without a time ("remind me to call mom", "צריך לחדש ביטוח")
+- alarm: ONLY when the user explicitly says alarm / שעון מעורר / תעיר אותי
+- note: save a note or idea ("note: great idea", "תרשום לי")
+- shopping: add items to a shopping/grocery list ("צריך לקנות ביצים ולחם")
+- question: the user asks a question
+- unknown: no clear intent
+
+Rules:
+- alarm vs reminder: without an explicit alarm word it is a reminder.
+- event vs reminder: meetings/appointments are events; things to do are reminders.
+- Resolve relative times against the "Current Local Time" given with the message.
+
+Reply with a JSON object: {"intent": "...", "confidence": 0.0-1.0, "entities": {"key": "value"}}
+Entities (strings only):
+- event/reminder: title; start_iso and end_iso (ISO 8601) ONLY if the user explicitly gives a date or time - never guess one.
+- alarm: start_iso (ISO 8601) and label (reason, "" if none).
+- shopping: items as a comma-separated list.
+
+Example:
+{"intent": "event", "confidence": 0.98, "entities": {"title": "Meeting with Boss", "start_iso": "2026-01-26T09:00:00", "end_iso": "2026-01-26T10:00:00"}}
+"""
+
+# The system message itself, built once and shared by every call
+# (the SDK only reads it), so a request only builds its own user message.
+_STATIC_SYSTEM_MSG = {"role": "system", "content": _STATIC_PREFIX}
+
+
 def _build_prompt(text: str) -> str:
     """
-    Build the OpenAI prompt for intent classification.
+    Build the variable part of the OpenAI prompt (the user message).
     
     This is PRIVATE (internal implementation detail).
+    The instructions live in _STATIC_PREFIX (system message); this is only
+    what changes per request, kept short and last.
     
     Args:
         text: User's raw input
         
     Returns:
-        str: Formatted prompt for OpenAI
+        str: The user message for OpenAI
     """
-    return f"""Classify the following user message into ONE of these intents:
-
-Intents:
-- event: User wants to create a calendar event (e.g., "schedule meeting tomorrow", "set appointment")
-- reminder: User wants to set a reminder OR a task — anything the user wants to remember or do, with or without a specific time (e.g., "remind me to call mom", "תזכיר לי לאסוף את המשלוח", "I need to fix the tap", "צריך לחדש ביטוח")
-- alarm: User explicitly wants to set an ALARM / clock alarm (e.g., "שעון מעורר", "תעיר אותי", "set alarm", "אלארם"). Use this ONLY when the user explicitly says alarm/שעון מעורר/תעיר אותי.
-- note: User wants to save a note/idea (e.g., "note: great idea", "save this thought", "תרשום לי")
-- shopping: User wants to add items to a SHOPPING/GROCERY list (e.g., "תוסיף חלב לרשימת קניות", "add milk and eggs", "צריך לקנות ביצים ולחם")
-- question: User is asking a question (e.g., "what's the weather?", "how do I...?")
-- unknown: Cannot determine clear intent
-
-User message: "{text}"
-Language Note: The user may speak Hebrew, English, or both. Transliterate or translate entities if necessary, but keep the core meaning. If it's an event, analyze the Hebrew temporal expressions (e.g. 'מחר' = tomorrow).
-Current Local Time: {os.getenv("CURRENT_TIME_CONTEXT", "2026-01-25T21:30:00")}
-
-Respond in this EXACT format:
-Intent: <one of the above intents>
-Confidence: <number between 0.0 and 1.0>
-Entities: <extracted info: key="value", key="value">
-- For 'event' or 'reminder': ONLY include start_iso (ISO 8601 format) and end_iso if the user EXPLICITLY mentions a date or time. If the user does NOT mention when, do NOT invent or guess a time — leave start_iso and end_iso out entirely.
-- For 'alarm': include start_iso (ISO 8601 format) for the alarm time, and label (the reason/description, if mentioned). If no label is given, set label="".
-- For 'shopping': include items as a comma-separated list of individual items. Example: items="חלב, ביצים, לחם"
-
-Example responses:
-Intent: event
-Confidence: 0.98
-Entities: title="Meeting with Boss", start_iso="2026-01-26T09:00:00", end_iso="2026-01-26T10:00:00"
-
-Intent: shopping
-Confidence: 0.95
-Entities: items="חלב, ביצים, לחם"
-"""
+    # "Now" is only formatted here, where the LLM actually needs to read it
+    now_ns = CURRENT_TIME_CONTEXT.get()
+    current_time = format_time_context(now_ns) if now_ns is not None else _DEFAULT_TIME_CONTEXT
+    
+    return f'Current Local Time: {current_time}\nUser message: "{text}"'
 
 
-def _parse_openai_response(response_text: str, original_text: str) -> dict:
+def _parse_openai_response(response_text: str, original_text: str) -> IntentResult:
     """
-    Parse OpenAI's response into our contract format.
+    Parse OpenAI's JSON response into our contract format.
     
     This is PRIVATE (internal implementation detail).
+    The request uses response_format=json_object, so the reply is a JSON object;
+    validation (known intent, clamped confidence, string entities) is in
+    _parse_json_response.
     
     Args:
         response_text: Raw response from OpenAI
@@ -207,52 +366,67 @@ def _parse_openai_response(response_text: str, original_text: str) -> dict:
     Returns:
         dict: Parsed result matching our contract
     """
+    parsed = _parse_json_response(response_text, original_text)
+    if parsed is None:
+        logger.error("Could not parse OpenAI response: %r", response_text)
+        return _fallback_intent(original_text)
+    return parsed
+
+
+def _parse_json_response(response_text: str, original_text: str) -> Optional[IntentResult]:
+    """
+    Parse a JSON reply ({"intent": ..., "confidence": ..., "entities": {...}}).
+    
+    Returns:
+        dict matching our contract, or None if it isn't valid JSON of that shape
+    """
     try:
-        # Parse the response (simple line-by-line parsing)
-        lines = response_text.strip().split('\n')
-        
-        intent = "unknown"
+        data = orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    
+    intent = str(data.get("intent", "")).strip().lower()
+    intent = sys.intern(intent) if intent in VALID_INTENTS else "unknown"
+    
+    try:
+        confidence = max(0.0, min(1.0, float(data.get("confidence", 0.5))))
+    except (TypeError, ValueError):
         confidence = 0.5
-        entities = {}
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith("Intent:"):
-                intent = line.split(":", 1)[1].strip().lower()
-                # Validate it's a known intent
-                if intent not in VALID_INTENTS:
-                    intent = "unknown"
-            elif line.startswith("Confidence:"):
-                try:
-                    confidence = float(line.split(":", 1)[1].strip())
-                    # Clamp to 0.0-1.0
-                    confidence = max(0.0, min(1.0, confidence))
-                except:
-                    confidence = 0.5
-            elif line.startswith("Entities:"):
-                entity_str = line.split(":", 1)[1].strip()
-                if entity_str.lower() != "none":
-                    # Simple key="value" parser
-                    import re
-                    matches = re.findall(r'(\w+)="([^"]*)"', entity_str)
-                    if matches:
-                        entities = {k: v for k, v in matches}
-                    else:
-                        entities = {"raw": entity_str}
-        
-        return {
-            "intent": intent,
-            "confidence": confidence,
-            "entities": entities,
-            "original_text": original_text
-        }
-        
-    except Exception as e:
-        print(f"[agent_process] ERROR parsing OpenAI response: {e}")
-        return _fallback_intent(original_text)
+    
+    entities = data.get("entities") or {}
+    if not isinstance(entities, dict):
+        entities = {"raw": str(entities)}
+    
+    return {
+        "intent": intent,
+        "confidence": confidence,
+        "entities": _entity_strings(entities),
+        "original_text": original_text
+    }
+
+
+def _entity_strings(entities: dict) -> dict:
+    """
+    Entity values as strings (lists as "a, b, c"), as the decision layer expects.
+    
+    ❌ str(None) is "None" - a JSON null would become a real-looking title/time.
+    ✅ Missing values (null, "", [] and nulls inside lists) are dropped, so the
+       decision layer sees the field as absent, same as if the model omitted it.
+    """
+    result = {}
+    for key, value in entities.items():
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value if v is not None and v != "")
+        elif value is not None:
+            value = str(value)
+        if value:
+            result[str(key)] = value
+    return result
 
 
-def _fallback_intent(text: str) -> dict:
+def _fallback_intent(text: str) -> IntentResult:
     """
     Fallback intent when OpenAI fails or is unavailable.
     
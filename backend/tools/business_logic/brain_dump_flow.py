@@ -42,8 +42,18 @@ FUTURE ENHANCEMENTS (Later Steps):
 - Smart feedback generation
 """
 
+import asyncio
+import logging
+from typing import Optional
 
-def brain_dump_flow(text: str, user_id: str) -> dict:
+from tools.agent.agent_process import process_text
+from tools.decision.decision_engine import decide
+from tools.actions.action_executor import execute
+
+logger = logging.getLogger(__name__)
+
+
+async def brain_dump_flow(text: str, user_id: str, user: Optional[dict] = None) -> dict:
     """
     Orchestrate the entire brain dump flow.
     
@@ -59,6 +69,8 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
     Args:
         text (str): The transcribed voice message from the user
         user_id (str): The verified user's ID (already passed security gate)
+        user (Optional[dict]): The user record the endpoint already resolved
+            (saves the action executor a second database lookup)
         
     Returns:
         dict: Result containing:
@@ -69,7 +81,7 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
             - debug (dict): Debug information (optional)
             
     Example:
-        >>> brain_dump_flow("Add milk to shopping list", "daniel")
+        >>> await brain_dump_flow("Add milk to shopping list", "daniel")
         {
             "success": True,
             "message": "I'll add this task for you: 'Add milk to shopping list'",
@@ -81,64 +93,37 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
     # STEP 1: AGENT - Classify Intent
     # =========================================================================
     
-    from tools.agent.agent_process import process_text
+    logger.debug("=== Starting flow for: '%s' ===", text)
     
-    print(f"[brain_dump_flow] === Starting flow for: '{text}' ===")
-    print(f"[brain_dump_flow] Step 1: Calling agent to classify intent...")
+    intent_result = await process_text(text)
     
-    intent_result = process_text(text)
-    
-    print(f"[brain_dump_flow] Agent returned:")
-    print(f"  - intent: {intent_result['intent']}")
-    print(f"  - confidence: {intent_result['confidence']}")
-    print(f"  - entities: {intent_result['entities']}")
+    # Guarded: the arguments themselves (dict lookups, len) cost something even when
+    # the message would be dropped - skip them entirely unless DEBUG is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Agent returned: intent=%s confidence=%s entities=%s",
+                     intent_result['intent'], intent_result['confidence'], intent_result['entities'])
     
     # =========================================================================
     # STEP 2: DECISION - Validate and Create Action Plan
     # =========================================================================
     
-    from tools.decision.decision_engine import decide
-    
-    print(f"[brain_dump_flow] Step 2: Calling decision engine...")
-    
     decision = decide(intent_result, user_id)
     
-    print(f"[brain_dump_flow] Decision engine returned:")
-    print(f"  - status: {decision['status']}")
-    print(f"  - actions: {len(decision['actions'])} action(s)")
-    print(f"  - feedback: {decision['feedback']}")
-    
-    # =========================================================================
-    # STEP 3: EXECUTE - Run Actions (if any)
-    # =========================================================================
-    
-    execution_results = []
-    action_summary = None
-    
-    if decision['actions']:
-        from tools.actions.action_executor import execute
-        
-        print(f"[brain_dump_flow] Step 3: Executing {len(decision['actions'])} action(s)...")
-        
-        execution_results = execute(decision['actions'], user_id)
-        
-        # Summarize what was executed
-        action_types = [result['type'] for result in execution_results if result.get('ok')]
-        if action_types:
-            action_summary = f"{', '.join(action_types)}"
-        
-        print(f"[brain_dump_flow] Execution complete: {len(execution_results)} result(s)")
-    else:
-        print(f"[brain_dump_flow] Step 3: No actions to execute (clarification/validation needed)")
+    if debug:
+        logger.debug("Decision engine returned: status=%s actions=%d feedback=%r",
+                     decision['status'], len(decision['actions']), decision['feedback'])
     
     # =========================================================================
-    # STEP 4: RESPOND - Format Response for User
+    # SHORTCUT CONTRACTS - note / reminder / alarm / shopping
     # =========================================================================
+    # These replies are built from the decision alone, so we return them BEFORE
+    # the execution step: their actions are stubs (or have no executor at all)
+    # whose results the contract never includes.
     
     # SPECIAL HANDLING FOR NOTES (Contract Check)
     # If intent is 'note', we MUST return the strict JSON format and bypass standard flow
     if intent_result.get('intent') == 'note':
-        print(f"[brain_dump_flow] Note intent detected. Returning strict JSON contract.")
         return {
             "status": "SUCCESS",
             "intent": "note",
@@ -148,8 +133,6 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
     # SPECIAL HANDLING FOR REMINDERS (Contract Check)
     # Similar to notes - return strict JSON format for the Shortcut to process
     if intent_result.get('intent') == 'reminder':
-        print(f"[brain_dump_flow] Reminder intent detected. Returning strict JSON contract.")
-        
         return {
             "status": decision['status'],  # SUCCESS or NEEDS_CLARIFICATION
             "intent": "reminder",
@@ -161,8 +144,6 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
     
     # SPECIAL HANDLING FOR ALARMS (Contract Check)
     if intent_result.get('intent') == 'alarm':
-        print(f"[brain_dump_flow] Alarm intent detected. Returning strict JSON contract.")
-        
         return {
             "status": decision['status'],  # SUCCESS or NEEDS_CLARIFICATION
             "intent": "alarm",
@@ -174,8 +155,6 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
     
     # SPECIAL HANDLING FOR SHOPPING (Contract Check)
     if intent_result.get('intent') == 'shopping':
-        print(f"[brain_dump_flow] Shopping intent detected. Returning strict JSON contract.")
-        
         return {
             "status": decision['status'],  # SUCCESS or NEEDS_CLARIFICATION
             "intent": "shopping",
@@ -184,14 +163,36 @@ def brain_dump_flow(text: str, user_id: str) -> dict:
             "clarification_for": decision.get('clarification_for')
         }
     
+    # =========================================================================
+    # STEP 3: EXECUTE - Run Actions (if any)
+    # =========================================================================
+    
+    execution_results = []
+    action_summary = None
+    
+    if decision['actions']:
+        # The executors call blocking clients (Google Calendar) -> run them in a worker thread
+        execution_results = await asyncio.to_thread(execute, decision['actions'], user_id, user)
+        
+        # Summarize what was executed
+        action_types = [result['type'] for result in execution_results if result.get('ok')]
+        if action_types:
+            action_summary = f"{', '.join(action_types)}"
+        
+        logger.debug("Execution complete: %d result(s)", len(execution_results))
+    else:
+        logger.debug("No actions to execute (clarification/validation needed)")
+    
+    # =========================================================================
+    # STEP 4: RESPOND - Format Response for User
+    # =========================================================================
+    
     # Determine overall success
     # SUCCESS status means we did something successfully
     # Other statuses mean we need user input or something failed
     success = decision['status'] == "SUCCESS"
     
-    print(f"[brain_dump_flow] === Flow complete ===")
-    print(f"  - Overall success: {success}")
-    print(f"  - Status: {decision['status']}")
+    logger.debug("=== Flow complete === success=%s status=%s", success, decision['status'])
     
     return {
         "success": success,
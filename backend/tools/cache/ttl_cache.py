@@ -0,0 +1,73 @@
+"""
+tools/cache/ttl_cache.py - Small In-Memory TTL Cache
+
+RESPONSIBILITY:
+- Remember recently computed values for a limited time (TTL)
+- Keep memory bounded (least recently used entries are evicted first)
+
+WHY THIS FILE EXISTS:
+- Several layers repeat the same slow network lookup (Supabase, Google, OpenAI)
+- A dict with an expiry time turns a repeated lookup into a memory read
+
+WHAT IT IS NOT:
+- Not shared between workers (each process has its own copy)
+- Not persistent (lost on restart)
+- Not a source of truth: callers must invalidate on writes
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries expire after `ttl` seconds.
+    
+    Example:
+        >>> cache = TTLCache(maxsize=1000, ttl=60)
+        >>> cache.set("daniel", {"user_id": "0501234567"})
+        >>> cache.get("daniel")
+        {"user_id": "0501234567"}
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key (used to invalidate after writes)."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,17 +1,63 @@
+"""
+tools/database/supabase_client.py - Shared Supabase (PostgREST) client
+
+We talk to Supabase's PostgREST API directly with one shared async client:
+- async: lookups don't block the event loop while waiting on the network
+- shared: TCP + TLS connections are kept alive and reused across requests
+- lazy: created on first use (get_supabase), so the env vars are read AFTER
+  .env has been loaded, whatever the import order
+"""
+
+import logging
 import os
-from supabase import create_client, Client
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_initialized = False
+
+
+def _env(key: str) -> str:
+    # Render dashboards sometimes keep the quotes around pasted values
+    return os.getenv(key, "").strip().replace('"', '').replace("'", "")
+
+
+def get_supabase() -> Optional[httpx.AsyncClient]:
+    """
+    The shared Supabase client, created on first call.
+    
+    Returns:
+        httpx.AsyncClient with base_url .../rest/v1 and auth headers,
+        or None if SUPABASE_URL / SUPABASE_KEY are not set
+    """
+    global _client, _initialized
+    if _initialized:
+        return _client
+    _initialized = True
 
-# These will be loaded from environment variables on Render
-SUPABASE_URL = os.getenv("SUPABASE_URL", "").strip().replace('"', '').replace("'", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY", "").strip().replace('"', '').replace("'", "")
+    # These will be loaded from environment variables on Render
+    url = _env("SUPABASE_URL")
+    key = _env("SUPABASE_KEY")
+    if not url or not key:
+        logger.warning("SUPABASE_URL or SUPABASE_KEY not set. Persistence will fail.")
+        return None
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("[Supabase] WARNING: SUPABASE_URL or SUPABASE_KEY not set. Persistence will fail.")
-    supabase: Client = None
-else:
     try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print(f"[Supabase] Client initialized (host: {SUPABASE_URL.split('//')[-1].split('/')[0]})")
+        _client = httpx.AsyncClient(
+            base_url=url.rstrip("/") + "/rest/v1",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            },
+            http2=True,
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+        logger.info("Client initialized (host: %s)", url.split('//')[-1].split('/')[0])
     except Exception as e:
-        print(f"[Supabase] ERROR during initialization: {e}")
-        supabase = None
+        logger.error("ERROR during initialization: %s", e)
+        _client = None
+    return _client
@@ -37,24 +37,106 @@ SAVE_NOTE             - Save note/idea
 """
 
 
+import logging
+import os
+import re
+import sys
+from collections import Counter
 from datetime import datetime
+from typing import List, Optional, Required, TypedDict
 
+logger = logging.getLogger(__name__)
+
+# Status codes and action types are interned (like VALID_INTENTS in agent_process):
+# comparisons downstream (status == STATUS_SUCCESS, dispatch on action type)
+# then hit the identity fast path
 
 # Status codes
-STATUS_SUCCESS = "SUCCESS"
-STATUS_NEEDS_CLARIFICATION = "NEEDS_CLARIFICATION"
-STATUS_FAILED_VALIDATION = "FAILED_VALIDATION"
-STATUS_SYSTEM_ERROR = "SYSTEM_ERROR"
+STATUS_SUCCESS = sys.intern("SUCCESS")
+STATUS_NEEDS_CLARIFICATION = sys.intern("NEEDS_CLARIFICATION")
+STATUS_FAILED_VALIDATION = sys.intern("FAILED_VALIDATION")
+STATUS_SYSTEM_ERROR = sys.intern("SYSTEM_ERROR")
 
 # Action types
-ACTION_CREATE_EVENT = "CREATE_EVENT"
-ACTION_CREATE_REMINDER = "CREATE_REMINDER"
-ACTION_CREATE_ALARM = "CREATE_ALARM"
-ACTION_SAVE_NOTE = "SAVE_NOTE"
-ACTION_ADD_SHOPPING = "ADD_SHOPPING"
-
-
-def decide(intent_result: dict, user_id: str) -> dict:
+ACTION_CREATE_TASK = sys.intern("CREATE_TASK")
+ACTION_CREATE_EVENT = sys.intern("CREATE_EVENT")
+ACTION_CREATE_REMINDER = sys.intern("CREATE_REMINDER")
+ACTION_CREATE_ALARM = sys.intern("CREATE_ALARM")
+ACTION_SAVE_NOTE = sys.intern("SAVE_NOTE")
+ACTION_ADD_SHOPPING = sys.intern("ADD_SHOPPING")
+
+# strftime formats used by the handlers (one place, shared by all)
+_ISO_FMT = "%Y-%m-%dT%H:%M:%S"    # what the Shortcut parses: "2026-02-06T17:00:00"
+_TODAY_FMT = "%Y-%m-%d"
+# Exactly _ISO_FMT's shape - the only strings _normalize_iso may return untouched
+_ISO_CANON_RE = re.compile(r"\A\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\Z")
+
+# Feedback prefixes (Hebrew, shown to the user by the Shortcut)
+_FB_REMINDER_SET = "תזכורת נקבעה: "
+_FB_ALARM_SET = "שעון מעורר נקבע ל-"
+
+# Fixed feedback messages (bilingual where the user may write in English)
+_FB_SYSTEM_ERROR = "Sorry, something went wrong. / סליחה, משהו השתבש בעיבוד הבקשה."
+_FB_TASK_MISSING = "I understand you want to add a task, but what should the task be? / הבנתי שרצית להוסיף משימה, אבל מה המשימה?"
+_FB_ALARM_INVALID_TIME = "לא הצלחתי לפענח את השעה. מתי לקבוע את השעון מעורר?"
+_FB_ALARM_MISSING_TIME = "מתי לקבוע את השעון מעורר?"
+_FB_SHOPPING_MISSING = "מה להוסיף לרשימת הקניות?"
+_FB_QUESTION = "I understand you have a question, but question handling is not implemented yet. / הבנתי שיש לך שאלה, אבל עדיין אין לי אפשרות לענות על שאלות. בינתיים אני יכול לעזור עם משימות ואירועים."
+_FB_UNKNOWN = "I didn't quite understand that. Could you rephrase? / לא לגמרי הבנתי אותך, אפשר לנסח מחדש? אני יכול לעזור לקבוע פגישות או לשמור משימות."
+
+# Time hints in the raw text, one scan instead of four substring passes.
+# Same matches as the old `"in " in text.lower()` / "at " / "בשעה" / "ב-" checks;
+# IGNORECASE replaces the .lower() copy of the text.
+_TIME_HINT_RE = re.compile(r"in |at |בשעה|ב-", re.IGNORECASE)
+# "time=" / "date=" markers in the agent's raw entity string
+_TIME_RAW_RE = re.compile(r"time=|date=")
+
+# Shopping items separator: the comma plus any whitespace around it, trimmed in the same pass
+_ITEM_SPLIT_RE = re.compile(r"\s*,\s*")
+
+class Decision(TypedDict, total=False):
+    """
+    What decide() returns (see decide() for the meaning of each key).
+    
+    A TypedDict, like IntentResult in agent_process: typed for readers and
+    checkers, but still a plain dict at runtime - the flow and the endpoint
+    index into it, and it is serialized as-is.
+    """
+    status: Required[str]
+    actions: Required[List[dict]]
+    feedback: Required[str]
+    debug: Required[dict]
+    # Intent-specific fields (present only for their intent)
+    reminder_title: str
+    reminder_iso: Optional[str]
+    reminder_time: None
+    reminder_date: None
+    alarm_iso: Optional[str]
+    alarm_label: str
+    items: List[str]
+    clarification_for: str
+
+
+# Entity keys copied into each action payload (what the executors may read).
+# Entities come from the LLM and can hold anything; only these travel on.
+_TASK_FIELDS = ("item", "task", "start_iso", "end_iso")
+_EVENT_FIELDS = ("start_iso", "end_iso", "location", "description", "title_raw")
+_REMINDER_FIELDS = ("start_iso", "end_iso", "time", "date")
+
+# Per-decision "debug" dicts (intent/confidence/reason) are only built with
+# DECISION_DEBUG=1. Nothing downstream reads them (the flow reports its own debug
+# info), so in production every decision shares one empty dict - never mutate it.
+_DEBUG = os.getenv("DECISION_DEBUG") == "1"
+_EMPTY_DEBUG: dict = {}
+
+# How often each intent reached decide() (only counted while DEBUG logging is on).
+# Cheap profile data for ordering the checks inside the handlers - logged every
+# _INTENT_COUNTS_LOG_EVERY decisions, so it actually shows up in the logs.
+_INTENT_COUNTS = Counter()
+_INTENT_COUNTS_LOG_EVERY = 100
+
+
+def decide(intent_result: dict, user_id: str, now: Optional[datetime] = None) -> Decision:
     """
     Decide what actions to take based on intent classification result.
     
@@ -70,6 +152,9 @@ def decide(intent_result: dict, user_id: str) -> dict:
                 "original_text": str
             }
         user_id (str): User identifier (for future user-specific rules)
+        now (datetime, optional): "Now" for this decision (defaults to datetime.now()).
+            Read once here and handed to the handler, so one request never
+            calls the clock twice - and tests can pin it.
         
     Returns:
         dict: Decision result
@@ -77,7 +162,7 @@ def decide(intent_result: dict, user_id: str) -> dict:
                 "status": str,              # SUCCESS / NEEDS_CLARIFICATION / FAILED_VALIDATION / SYSTEM_ERROR
                 "actions": list[dict],      # Actions to execute (empty if clarification needed)
                 "feedback": str,            # User-facing message
-                "debug": dict              # Optional debug info
+                "debug": dict              # Debug info (empty unless DECISION_DEBUG=1)
             }
             
     Example:
@@ -96,43 +181,93 @@ def decide(intent_result: dict, user_id: str) -> dict:
         original_text = intent_result.get("original_text", "")
         confidence = intent_result.get("confidence", 0.0)
         
-        print(f"[decision_engine] Processing intent: {intent}")
-        print(f"[decision_engine] Entities: {entities}")
+        if logger.isEnabledFor(logging.DEBUG):
+            _INTENT_COUNTS[intent] += 1
+            logger.debug("Processing intent: %s entities=%s", intent, entities)
+            if _INTENT_COUNTS.total() % _INTENT_COUNTS_LOG_EVERY == 0:
+                logger.debug("Intent counts so far: %s", dict(_INTENT_COUNTS.most_common()))
         
-        # Route to specific intent handler
-        if intent == "task":
-            # Task is treated as a reminder (no time)
-            return _decide_reminder(original_text, entities, user_id, confidence)
-        elif intent == "event":
-            return _decide_event(original_text, entities, user_id, confidence)
-        elif intent == "reminder":
-            return _decide_reminder(original_text, entities, user_id, confidence)
-        elif intent == "alarm":
-            return _decide_alarm(original_text, entities, user_id, confidence)
-        elif intent == "note":
-            return _decide_note(original_text, entities, user_id, confidence)
-        elif intent == "shopping":
-            return _decide_shopping(original_text, entities, user_id, confidence)
-        elif intent == "question":
-            return _decide_question(original_text, entities, user_id, confidence)
-        else:  # unknown
-            return _decide_unknown(original_text, entities, user_id, confidence)
+        # Route to specific intent handler (see _HANDLERS at the bottom; unknown -> _decide_unknown)
+        handler = _HANDLERS.get(intent, _decide_unknown)
+        return handler(original_text, entities, user_id, confidence, now or datetime.now())
             
     except Exception as e:
-        print(f"[decision_engine] ERROR: {e}")
+        logger.exception("Decision failed for intent %s", intent_result.get("intent"))
         return {
             "status": STATUS_SYSTEM_ERROR,
             "actions": [],
-            "feedback": "Sorry, something went wrong. / סליחה, משהו השתבש בעיבוד הבקשה.",
+            "feedback": _FB_SYSTEM_ERROR,
             "debug": {"error": str(e)}
         }
 
 
+def _normalize_iso(value) -> Optional[str]:
+    """
+    An ISO 8601 time from the agent, as "YYYY-MM-DDTHH:MM:SS"; None if it isn't one.
+    
+    fromisoformat (fast, C) still validates every value - Feb 30 is rejected.
+    The expensive part is strftime (~15x the parse), and the common case is
+    already canonical, so a value that matches _ISO_CANON_RE exactly is
+    returned as-is instead of being re-formatted into itself.
+    
+    ❌ A length check is not enough: "2026-02-06T17:00+02" and
+       "2026-W06-5T17:00:00" are 19 chars with a "T" too - they go through
+       strftime like every other non-canonical form.
+    """
+    try:
+        dt = datetime.fromisoformat(value)
+    except (ValueError, TypeError):  # malformed string / not a string at all
+        return None
+    if _ISO_CANON_RE.match(value):
+        return value
+    return dt.strftime(_ISO_FMT)
+
+
+def _pick(entities: dict, fields: tuple) -> dict:
+    """The whitelisted subset of the agent's entities (see _*_FIELDS)."""
+    return {key: entities[key] for key in fields if key in entities}
+
+
+def _success(actions: list, feedback: str, intent: str, confidence: float,
+             reason: Optional[str] = None, **extra) -> Decision:
+    """
+    Build a SUCCESS decision.
+    
+    Every handler returns the same skeleton; building it in one place keeps the
+    keys (and their order) identical across intents. Intent-specific fields
+    (reminder_iso, items, ...) go in **extra.
+    """
+    if _DEBUG:
+        debug = {"intent": intent, "confidence": confidence}
+        if reason:
+            debug["reason"] = reason
+    else:
+        debug = _EMPTY_DEBUG
+    return {"status": STATUS_SUCCESS, "actions": actions, "feedback": feedback, **extra, "debug": debug}
+
+
+def _clarify(feedback: str, intent: str, confidence: float, reason: str,
+             status: str = STATUS_NEEDS_CLARIFICATION, **extra) -> Decision:
+    """
+    Build a decision that asks the user for more (nothing to execute).
+    
+    NEEDS_CLARIFICATION by default; pass status=STATUS_FAILED_VALIDATION when
+    what was given is unusable rather than missing.
+    """
+    return {
+        "status": status,
+        "actions": [],
+        "feedback": feedback,
+        **extra,
+        "debug": {"intent": intent, "confidence": confidence, "reason": reason} if _DEBUG else _EMPTY_DEBUG,
+    }
+
+
 # =============================================================================
 # INTENT-SPECIFIC DECISION FUNCTIONS
 # =============================================================================
 
-def _decide_task(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_task(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for task intent.
     
@@ -150,33 +285,36 @@ def _decide_task(text: str, entities: dict, user_id: str, confidence: float) ->
     
     if has_task_info:
         # SUCCESS - we have enough to create a task
+        # Whitelisted entities first, then our resolved fields on top:
+        # an empty entity "title" can no longer blank the resolved one
         action = {
             "type": ACTION_CREATE_TASK,
             "payload": {
+                **_pick(entities, _TASK_FIELDS),
                 "title": entities.get("title") or entities.get("item") or text,
                 "entities_raw": entities.get("raw", ""),
                 "user_id": user_id,
-                **entities # Pass all extracted entities
             }
         }
         
-        return {
-            "status": STATUS_SUCCESS,
-            "actions": [action],
-            "feedback": f"I'll add this task for you: '{text}' / הוספתי את המשימה: '{text}'",
-            "debug": {"intent": "task", "confidence": confidence}
-        }
+        return _success(
+            [action],
+            f"I'll add this task for you: '{text}' / הוספתי את המשימה: '{text}'",
+            "task",
+            confidence
+        )
     else:
         # FAILED_VALIDATION - missing task info
-        return {
-            "status": STATUS_FAILED_VALIDATION,
-            "actions": [],
-            "feedback": "I understand you want to add a task, but what should the task be? / הבנתי שרצית להוסיף משימה, אבל מה המשימה?",
-            "debug": {"intent": "task", "confidence": confidence, "reason": "missing_task_info"}
-        }
+        return _clarify(
+            _FB_TASK_MISSING,
+            "task",
+            confidence,
+            "missing_task_info",
+            status=STATUS_FAILED_VALIDATION
+        )
 
 
-def _decide_event(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_event(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for event intent.
     
@@ -185,14 +323,15 @@ def _decide_event(text: str, entities: dict, user_id: str, confidence: float) ->
     - If missing time/date → NEEDS_CLARIFICATION asking when
     """
     # Check if we have time/date information
-    entity_raw = entities.get("raw", "").lower()
+    # Cheapest first: dict lookups short-circuit before any substring scan of "raw"
+    raw = entities.get("raw")
+    entity_raw = raw.lower() if raw else ""  # no .lower() copy when the agent sent no raw string
     has_time_info = (
-        "time=" in entity_raw or 
-        "date=" in entity_raw or
+        entities.get("start_iso") or # The ISO format the agent normally returns
         entities.get("time") or 
         entities.get("date") or
         entities.get("when") or
-        entities.get("start_iso") # Add support for our new ISO format
+        _TIME_RAW_RE.search(entity_raw)
     )
     
     if has_time_info:
@@ -200,30 +339,30 @@ def _decide_event(text: str, entities: dict, user_id: str, confidence: float) ->
         action = {
             "type": ACTION_CREATE_EVENT,
             "payload": {
+                **_pick(entities, _EVENT_FIELDS),  # start_iso, end_iso, ... (resolved fields below win)
                 "title": entities.get("title") or text,
                 "when_raw": entity_raw or text,
                 "user_id": user_id,
-                **entities # This will include start_iso, end_iso, etc.
             }
         }
         
-        return {
-            "status": STATUS_SUCCESS,
-            "actions": [action],
-            "feedback": f"I'll schedule this event for you: '{text}' / קבעתי לך את האירוע: '{text}'",
-            "debug": {"intent": "event", "confidence": confidence}
-        }
+        return _success(
+            [action],
+            f"I'll schedule this event for you: '{text}' / קבעתי לך את האירוע: '{text}'",
+            "event",
+            confidence
+        )
     else:
         # NEEDS_CLARIFICATION - missing time info
-        return {
-            "status": STATUS_NEEDS_CLARIFICATION,
-            "actions": [],
-            "feedback": f"I understand you want to schedule '{text}', but when should it be? / הבנתי שאתה רוצה לקבוע את '{text}', אבל מתי?",
-            "debug": {"intent": "event", "confidence": confidence, "reason": "missing_time"}
-        }
+        return _clarify(
+            f"I understand you want to schedule '{text}', but when should it be? / הבנתי שאתה רוצה לקבוע את '{text}', אבל מתי?",
+            "event",
+            confidence,
+            "missing_time"
+        )
 
 
-def _decide_reminder(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_reminder(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for reminder intent.
     
@@ -241,86 +380,79 @@ def _decide_reminder(text: str, entities: dict, user_id: str, confidence: float)
     reminder_title = entities.get("title") or entities.get("reminder") or entities.get("task") or text
     
     # Check if we have time information
-    entity_raw = entities.get("raw", "").lower()
+    raw = entities.get("raw")
+    entity_raw = raw.lower() if raw else ""  # no .lower() copy when the agent sent no raw string
     start_iso = entities.get("start_iso")  # ISO format from agent
     time_only = entities.get("time")  # Just time like "17:00"
     
+    # Cheapest first: entity lookups, then substring scans of raw, then of the text
     has_time_info = (
         start_iso or
         time_only or
         "time=" in entity_raw or 
-        "in " in text.lower() or  # "remind me in 1 hour"
-        "at " in text.lower() or  # "remind me at 5pm"
-        "בשעה" in text or  # Hebrew "at hour"
-        "ב-" in text  # Hebrew time prefix
+        _TIME_HINT_RE.search(text)  # "in 1 hour", "at 5pm", "בשעה", "ב-"
     )
     
     if has_time_info:
         # SUCCESS - we have time info
         # Build a full ISO 8601 datetime string for the Shortcut
-        reminder_iso = None
-        
-        if start_iso:
-            # Validate and normalize ISO format: "2026-02-06T17:00:00"
-            try:
-                from datetime import datetime
-                dt = datetime.fromisoformat(start_iso)
-                reminder_iso = dt.strftime("%Y-%m-%dT%H:%M:%S")
-            except:
-                pass
+        # Validate and normalize ISO format: "2026-02-06T17:00:00"
+        reminder_iso = _normalize_iso(start_iso) if start_iso else None
+        valid_iso = reminder_iso is not None  # canonical -> date/time can be sliced out below
         
         if not reminder_iso and time_only:
             # Build ISO from time_only + today's date
-            try:
-                from datetime import datetime
-                today = datetime.now().strftime("%Y-%m-%d")
-                reminder_iso = f"{today}T{time_only}:00"
-            except:
-                pass
+            # (kept even if it doesn't parse - the Shortcut gets what the user said)
+            built_iso = f"{now.strftime(_TODAY_FMT)}T{time_only}:00"
+            reminder_iso = _normalize_iso(built_iso)
+            valid_iso = reminder_iso is not None
+            if not valid_iso:
+                reminder_iso = built_iso
         
         action = {
             "type": ACTION_CREATE_REMINDER,
             "payload": {
+                **_pick(entities, _REMINDER_FIELDS),  # resolved fields below win
                 "title": reminder_title,
                 "when_raw": entity_raw or text,
                 "user_id": user_id,
-                **entities
             }
         }
         
-        # Format feedback message (human-readable)
-        feedback_msg = f"תזכורת נקבעה: '{reminder_title}'"
-        if reminder_iso:
-            try:
-                from datetime import datetime
-                dt = datetime.fromisoformat(reminder_iso)
-                feedback_msg += f" ב-{dt.strftime('%H:%M')} ({dt.strftime('%Y-%m-%d')})"
-            except:
-                feedback_msg += f" ({reminder_iso})"
+        # Format feedback message (human-readable), built in one go
+        if valid_iso:
+            # "YYYY-MM-DDTHH:MM:SS" -> HH:MM and YYYY-MM-DD
+            when = f" ב-{reminder_iso[11:16]} ({reminder_iso[:10]})"
+        elif reminder_iso:
+            # Built from a time_only that doesn't parse: echo it as-is
+            when = f" ({reminder_iso})"
+        else:
+            when = ""
+        feedback_msg = f"{_FB_REMINDER_SET}'{reminder_title}'{when}"
         
-        return {
-            "status": STATUS_SUCCESS,
-            "actions": [action],
-            "feedback": feedback_msg,
-            "reminder_title": reminder_title,
-            "reminder_iso": reminder_iso,  # Full ISO 8601: "2026-02-10T16:00:00"
-            "debug": {"intent": "reminder", "confidence": confidence}
-        }
+        return _success(
+            [action],
+            feedback_msg,
+            "reminder",
+            confidence,
+            reminder_title=reminder_title,
+            reminder_iso=reminder_iso  # Full ISO 8601: "2026-02-10T16:00:00"
+        )
     else:
         # NEEDS_CLARIFICATION - missing time
-        return {
-            "status": STATUS_NEEDS_CLARIFICATION,
-            "actions": [],
-            "feedback": f"מתי להזכיר לך על '{reminder_title}'?",
-            "reminder_title": reminder_title,
-            "reminder_time": None,
-            "reminder_date": None,
-            "clarification_for": "time",
-            "debug": {"intent": "reminder", "confidence": confidence, "reason": "missing_time"}
-        }
-
-
-def _decide_alarm(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+        return _clarify(
+            f"מתי להזכיר לך על '{reminder_title}'?",
+            "reminder",
+            confidence,
+            "missing_time",
+            reminder_title=reminder_title,
+            reminder_time=None,
+            reminder_date=None,
+            clarification_for="time"
+        )
+
+
+def _decide_alarm(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for alarm intent.
     
@@ -340,40 +472,29 @@ def _decide_alarm(text: str, entities: dict, user_id: str, confidence: float) ->
     
     if start_iso:
         # SUCCESS - we have time info
-        alarm_iso = None
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(start_iso)
-            alarm_iso = dt.strftime("%Y-%m-%dT%H:%M:%S")
-        except:
-            pass
+        alarm_iso = _normalize_iso(start_iso)
         
-        if not alarm_iso:
-            return {
-                "status": STATUS_NEEDS_CLARIFICATION,
-                "actions": [],
-                "feedback": "לא הצלחתי לפענח את השעה. מתי לקבוע את השעון מעורר?",
-                "alarm_label": alarm_label,
-                "alarm_iso": None,
-                "clarification_for": "time",
-                "debug": {"intent": "alarm", "confidence": confidence, "reason": "invalid_time"}
-            }
+        if alarm_iso is None:
+            return _clarify(
+                _FB_ALARM_INVALID_TIME,
+                "alarm",
+                confidence,
+                "invalid_time",
+                alarm_label=alarm_label,
+                alarm_iso=None,
+                clarification_for="time"
+            )
         
-        # Format feedback
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(alarm_iso)
-            time_str = dt.strftime("%H:%M")
-            date_str = dt.strftime("%Y-%m-%d")
-            feedback_msg = f"שעון מעורר נקבע ל-{time_str}"
-            # Only mention date if it's not today
-            today = datetime.now().strftime("%Y-%m-%d")
-            if date_str != today:
-                feedback_msg += f" ({date_str})"
-            if alarm_label:
-                feedback_msg += f" — {alarm_label}"
-        except:
-            feedback_msg = f"שעון מעורר נקבע ({alarm_iso})"
+        # Format feedback (alarm_iso is canonical here: slice HH:MM / YYYY-MM-DD out of it)
+        # Collect the fragments, join once (no intermediate strings from +=)
+        date_str = alarm_iso[:10]
+        parts = [_FB_ALARM_SET, alarm_iso[11:16]]
+        # Only mention date if it's not today
+        if date_str != now.strftime(_TODAY_FMT):
+            parts.append(f" ({date_str})")
+        if alarm_label:
+            parts.append(f" — {alarm_label}")
+        feedback_msg = "".join(parts)
         
         action = {
             "type": ACTION_CREATE_ALARM,
@@ -384,28 +505,28 @@ def _decide_alarm(text: str, entities: dict, user_id: str, confidence: float) ->
             }
         }
         
-        return {
-            "status": STATUS_SUCCESS,
-            "actions": [action],
-            "feedback": feedback_msg,
-            "alarm_iso": alarm_iso,
-            "alarm_label": alarm_label,
-            "debug": {"intent": "alarm", "confidence": confidence}
-        }
+        return _success(
+            [action],
+            feedback_msg,
+            "alarm",
+            confidence,
+            alarm_iso=alarm_iso,
+            alarm_label=alarm_label
+        )
     else:
         # NEEDS_CLARIFICATION - missing time
-        return {
-            "status": STATUS_NEEDS_CLARIFICATION,
-            "actions": [],
-            "feedback": "מתי לקבוע את השעון מעורר?",
-            "alarm_label": alarm_label,
-            "alarm_iso": None,
-            "clarification_for": "time",
-            "debug": {"intent": "alarm", "confidence": confidence, "reason": "missing_time"}
-        }
-
-
-def _decide_shopping(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+        return _clarify(
+            _FB_ALARM_MISSING_TIME,
+            "alarm",
+            confidence,
+            "missing_time",
+            alarm_label=alarm_label,
+            alarm_iso=None,
+            clarification_for="time"
+        )
+
+
+def _decide_shopping(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for shopping intent.
     
@@ -424,7 +545,7 @@ def _decide_shopping(text: str, entities: dict, user_id: str, confidence: float)
     
     if items_raw:
         # Parse comma-separated items: "חלב, ביצים, לחם"
-        items = [item.strip() for item in items_raw.split(",") if item.strip()]
+        items = [item for item in _ITEM_SPLIT_RE.split(items_raw.strip()) if item]
     else:
         # Try to extract from text directly (fallback)
         items = []
@@ -441,26 +562,26 @@ def _decide_shopping(text: str, entities: dict, user_id: str, confidence: float)
         items_display = ", ".join(items)
         feedback_msg = f"נוסף לרשימת קניות: {items_display}"
         
-        return {
-            "status": STATUS_SUCCESS,
-            "actions": [action],
-            "feedback": feedback_msg,
-            "items": items,
-            "debug": {"intent": "shopping", "confidence": confidence}
-        }
+        return _success(
+            [action],
+            feedback_msg,
+            "shopping",
+            confidence,
+            items=items
+        )
     else:
         # No items detected
-        return {
-            "status": STATUS_NEEDS_CLARIFICATION,
-            "actions": [],
-            "feedback": "מה להוסיף לרשימת הקניות?",
-            "items": [],
-            "clarification_for": "items",
-            "debug": {"intent": "shopping", "confidence": confidence, "reason": "missing_items"}
-        }
+        return _clarify(
+            _FB_SHOPPING_MISSING,
+            "shopping",
+            confidence,
+            "missing_items",
+            items=[],
+            clarification_for="items"
+        )
 
 
-def _decide_note(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_note(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for note intent.
     
@@ -471,7 +592,8 @@ def _decide_note(text: str, entities: dict, user_id: str, confidence: float) ->
     """
     # Format the note content (this is the ONLY responsibility of the server for notes)
     # The client (Shortcut) expects: "Text... (DD/MM/YYYY HH:MM)"
-    now_str = datetime.now().strftime("%d/%m/%Y %H:%M")
+    # Same as strftime("%d/%m/%Y %H:%M"), without strftime parsing its format on every call
+    now_str = f"{now.day:02d}/{now.month:02d}/{now.year:04d} {now.hour:02d}:{now.minute:02d}"
     formatted_content = f"{text}\n\n({now_str})"
     
     # We create a stub action just for internal tracking/logging if needed, 
@@ -486,16 +608,16 @@ def _decide_note(text: str, entities: dict, user_id: str, confidence: float) ->
         }
     }
     
-    return {
-        "status": STATUS_SUCCESS,
-        "actions": [action],
-        # CRITICAL: This feedback string IS the message payload for the shortcut
-        "feedback": formatted_content,
-        "debug": {"intent": "note", "confidence": confidence}
-    }
+    # CRITICAL: The feedback string (formatted_content) IS the message payload for the shortcut
+    return _success(
+        [action],
+        formatted_content,
+        "note",
+        confidence
+    )
 
 
-def _decide_question(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_question(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for question intent.
     
@@ -503,24 +625,43 @@ def _decide_question(text: str, entities: dict, user_id: str, confidence: float)
     - For Step 4: return SUCCESS but explain questions not implemented yet
     - Future: might integrate with search/knowledge base
     """
-    return {
-        "status": STATUS_SUCCESS,
-        "actions": [action],
-        "feedback": "I understand you have a question, but question handling is not implemented yet. / הבנתי שיש לך שאלה, אבל עדיין אין לי אפשרות לענות על שאלות. בינתיים אני יכול לעזור עם משימות ואירועים.",
-        "debug": {"intent": "question", "confidence": confidence, "reason": "not_implemented"}
-    }
+    return _success(
+        [],  # nothing to execute (no action is built for questions)
+        _FB_QUESTION,
+        "question",
+        confidence,
+        reason="not_implemented"
+    )
 
 
-def _decide_unknown(text: str, entities: dict, user_id: str, confidence: float) -> dict:
+def _decide_unknown(text: str, entities: dict, user_id: str, confidence: float, now: datetime) -> Decision:
     """
     Decide what to do for unknown intent.
     
     Rules:
     - NEEDS_CLARIFICATION asking user to rephrase
     """
-    return {
-        "status": STATUS_NEEDS_CLARIFICATION,
-        "actions": [],
-        "feedback": "I didn't quite understand that. Could you rephrase? / לא לגמרי הבנתי אותך, אפשר לנסח מחדש? אני יכול לעזור לקבוע פגישות או לשמור משימות.",
-        "debug": {"intent": "unknown", "confidence": confidence, "reason": "unclear_intent"}
-    }
+    return _clarify(
+        _FB_UNKNOWN,
+        "unknown",
+        confidence,
+        "unclear_intent"
+    )
+
+
+# =============================================================================
+# DISPATCH TABLE
+# =============================================================================
+# intent -> handler(text, entities, user_id, confidence, now)
+# One dict lookup instead of an if/elif ladder. Anything not listed
+# (including "unknown") goes to _decide_unknown.
+
+_HANDLERS = {
+    "task": _decide_reminder,  # Task is treated as a reminder (no time)
+    "event": _decide_event,
+    "reminder": _decide_reminder,
+    "alarm": _decide_alarm,
+    "note": _decide_note,
+    "shopping": _decide_shopping,
+    "question": _decide_question,
+}
@@ -1,69 +1,229 @@
+import asyncio
 import os
-import json
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import httplib2
+import orjson
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp, Request as AuthRequest
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from tools.cache.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Backend root (this file is backend/tools/google_calendar/calendar_client.py),
+# where the local development key file lives - resolved once, at import
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_DEFAULT_KEY_FILENAME = "brain-dump-484011-7dc82cec457d.json"
+
+# Event times are sent as local wall-clock time + an explicit zone (see _event_body)
+_EVENT_TZ = "Asia/Jerusalem"
+_EVENT_DT_FMT = "%Y-%m-%dT%H:%M:%S"
+# Exactly _EVENT_DT_FMT's shape - the only values _event_time_str passes through
+_EVENT_DT_RE = re.compile(r"\A\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\Z")
+_DEFAULT_EVENT_LENGTH = timedelta(hours=1)
+
+# The access token is refreshed in the background this long before it expires,
+# so a user request never waits for the token endpoint
+_TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+# Retry delay after a failed refresh (also the shortest gap between refreshes)
+_TOKEN_RETRY_SECONDS = 60
+
+# How long a successful verify_access() is trusted without asking Google again
+_VERIFIED_TTL_SECONDS = 300  # 5 minutes - an unshared calendar stops counting soon after
+
+# How long an identical event request (same calendar, title, start, end) is
+# answered with the event already created instead of inserting a duplicate.
+# Only a retry window (same as /brain-dump's reply replay): after it, dictating
+# the same event again - e.g. after deleting it - creates it again.
+_CREATED_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=1)
+def _load_creds_info() -> dict:
+    """
+    The parsed service-account key (env var JSON, or the local key file).
+    
+    Parsed once per process: every Credentials object after the first is
+    built from this dict, with no env lookup, file read or JSON parse.
+    Failures are not cached (lru_cache doesn't store exceptions), so a
+    fixed deployment recovers on the next attempt.
+    """
+    # 1. Try loading from a JSON environment variable (preferred for Render)
+    # Check both naming conventions to be safe (Render has _KEY_ in it)
+    json_content = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON") or os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY_JSON")
+    
+    if json_content:
+        try:
+            logger.info("Found GOOGLE_SERVICE_ACCOUNT_JSON env var, parsing it")
+            return orjson.loads(json_content)
+        except Exception as e:
+            logger.error("Could not parse GOOGLE_SERVICE_ACCOUNT_JSON: %s", e)
+    else:
+        logger.warning("GOOGLE_SERVICE_ACCOUNT_JSON env var is NOT set or EMPTY")
+
+    # 2. Fallback to local file for development
+    # (read here, not at import: .env may be loaded after this module is imported)
+    key_filename = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY", _DEFAULT_KEY_FILENAME)
+    json_path = os.path.join(_BACKEND_DIR, key_filename)
+    
+    logger.info("Falling back to local key file: %s", json_path)
+    
+    if not os.path.exists(json_path):
+        # Debug: which env vars ARE present (just keys) - only built when DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Available env vars: %s", sorted(os.environ))
+        if json_content: # If we HAD env var but parsing failed
+             raise RuntimeError("Failed to load credentials from BOTH env var and local file.")
+        raise FileNotFoundError(f"[DEPLOYMENT_TEST_V2] Key not found at {json_path} and GOOGLE_SERVICE_ACCOUNT_JSON is missing.")
+    
+    with open(json_path, "rb") as f:
+        return orjson.loads(f.read())
+
 class CalendarClient:
     def __init__(self):
         # Using full calendar scope to allow creating and managing events
         self.scopes = ['https://www.googleapis.com/auth/calendar']
         self.creds = self._load_credentials()
-        self.service = build('calendar', 'v3', credentials=self.creds)
+        # Built once per process (the client is a lazy singleton, see get_calendar_client).
+        # static_discovery: use the API description bundled with googleapiclient
+        #   instead of downloading it from Google on startup.
+        # cache_discovery=False: nothing to cache then (and skips the file_cache probe).
+        self.service = build('calendar', 'v3', credentials=self.creds,
+                             static_discovery=True, cache_discovery=False)
+        # One authorized keep-alive transport per thread (see _http)
+        self._local = threading.local()
+        # Calendars we recently verified we can access (see verify_access)
+        self._verified = TTLCache(maxsize=5000, ttl=_VERIFIED_TTL_SECONDS)
+        # Recently created events, by (calendar_id, title, start_iso, end_iso):
+        # a retried dump gets the same event back instead of a second copy.
+        # Only successes are stored; two identical requests racing each other
+        # can still both insert (this catches retries, not concurrency).
+        self._created = TTLCache(maxsize=5000, ttl=_CREATED_TTL_SECONDS)
+        # Background token refresh - started/stopped by the app, not here
+        # (see start_token_refresh): constructing a client has no side effects
+        self._refresh_lock = threading.Lock()  # guards _refresh_timer
+        self._refresh_timer = None   # the pending threading.Timer, None when stopped
+        self._token_lock = threading.Lock()    # one creds.refresh() at a time
 
-    def _load_credentials(self):
-        # 1. Try loading from a JSON environment variable (preferred for Render)
-        # Check both naming conventions to be safe (Render has _KEY_ in it)
-        json_content = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON") or os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY_JSON")
+    def start_token_refresh(self):
+        """
+        Fetch an access token now, then keep it fresh in the background.
         
-        if json_content:
-            try:
-                print("[CalendarClient] FOUND GOOGLE_SERVICE_ACCOUNT_JSON env var. Attempting to parse...")
-                info = json.loads(json_content)
-                return service_account.Credentials.from_service_account_info(
-                    info, scopes=self.scopes)
-            except Exception as e:
-                print(f"[CalendarClient] ERROR parsing GOOGLE_SERVICE_ACCOUNT_JSON: {e}")
-        else:
-            print("[CalendarClient] WARNING: GOOGLE_SERVICE_ACCOUNT_JSON env var is NOT set or EMPTY.")
+        Called ONCE, from the app's startup hook (see start_token_refresher).
+        The first refresh runs here, synchronously, so the token is already
+        valid before any request - the transports never refresh it concurrently.
+        A second call while running is a no-op.
+        """
+        with self._refresh_lock:
+            if self._refresh_timer is not None:
+                return
+            self._refresh_timer = False  # "starting": not None, nothing to cancel yet
+        self._refresh_token()
 
-        # 2. Fallback to local file for development
-        key_filename = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY", "brain-dump-484011-7dc82cec457d.json")
-        
-        # Look for the file in the same directory as this script, or the backend root
-        current_dir = os.path.dirname(os.path.abspath(__file__)) # tools/google_calendar
-        backend_dir = os.path.dirname(os.path.dirname(current_dir)) # backend root
-        json_path = os.path.join(backend_dir, key_filename)
+    def stop_token_refresh(self):
+        """Cancel the pending refresh (app shutdown). Safe to call when not running."""
+        with self._refresh_lock:
+            timer, self._refresh_timer = self._refresh_timer, None
+        if timer:
+            timer.cancel()
+
+    def _schedule_token_refresh(self, delay: float):
+        with self._refresh_lock:
+            if self._refresh_timer is None:
+                return  # stopped meanwhile
+            timer = threading.Timer(delay, self._refresh_token)
+            timer.daemon = True  # never keeps the process alive on shutdown
+            self._refresh_timer = timer
+            timer.start()
+
+    def _refresh_token(self):
+        """
+        Refresh the shared access token, then schedule the next refresh.
         
-        print(f"[CalendarClient] Attempting fallback to local file: {json_path}")
+        Runs on a timer thread, ~_TOKEN_REFRESH_MARGIN before expiry. The token is
+        still valid at that point, so the transports (which only refresh an
+        invalid token themselves) never race this. The lock keeps two of our own
+        refreshes (start racing a timer) from mutating creds at once.
+        """
+        try:
+            with self._token_lock:
+                self.creds.refresh(AuthRequest(httplib2.Http(timeout=10)))
+        except Exception as e:
+            logger.warning("Access token refresh failed, retrying in %ss: %s", _TOKEN_RETRY_SECONDS, e)
+            self._schedule_token_refresh(_TOKEN_RETRY_SECONDS)
+            return
+
+        # creds.expiry is naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if self.creds.expiry is not None:
+            delay = (self.creds.expiry - now - _TOKEN_REFRESH_MARGIN).total_seconds()
+        else:
+            delay = 0
+        self._schedule_token_refresh(max(delay, _TOKEN_RETRY_SECONDS))
+
+    def _http(self) -> AuthorizedHttp:
+        """
+        The calling thread's authorized transport, created on first use.
         
-        if not os.path.exists(json_path):
-            # Debug: Print which env vars ARE present (just keys)
-            print(f"[CalendarClient] Debug - Available Env Vars: {list(os.environ.keys())}")
-            if json_content: # If we HAD env var but parsing failed
-                 raise RuntimeError("Failed to load credentials from BOTH env var and local file.")
-            raise FileNotFoundError(f"[DEPLOYMENT_TEST_V2] Key not found at {json_path} and GOOGLE_SERVICE_ACCOUNT_JSON is missing.")
-            
-        return service_account.Credentials.from_service_account_file(
-            json_path, scopes=self.scopes)
+        httplib2 transports are NOT thread-safe, so they can't be shared between
+        the worker threads the async methods run in. But each thread keeps its own
+        alive, so repeated calls reuse the open connection (and the access token)
+        instead of paying a new TCP + TLS handshake every time.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=10))
+            self._local.http = http
+        return http
+
+    def _load_credentials(self):
+        # Key parsed once per process (see _load_creds_info). The single Credentials
+        # object is shared by every thread's transport (see _http), so its access
+        # token is fetched once and reused until it expires.
+        return service_account.Credentials.from_service_account_info(
+            _load_creds_info(), scopes=self.scopes)
 
 
     def verify_access(self, calendar_id: str) -> bool:
         """
         Check if we have access to the specified calendar.
+        
+        Caching:
+        - Only SUCCESSES are cached: a failed check is always re-done (the user may
+          have just fixed the sharing settings)
+        - Trade-off: an unshare is noticed up to _VERIFIED_TTL_SECONDS late
         """
+        if self._verified.get(calendar_id):
+            return True
         try:
-            print(f"[CalendarClient] Verifying access to: {calendar_id}")
-            self.service.calendars().get(calendarId=calendar_id).execute()
-            print(f"[CalendarClient] Access verified for {calendar_id}")
+            logger.debug("Verifying access to: %s", calendar_id)
+            self.service.calendars().get(calendarId=calendar_id).execute(http=self._http())
+            logger.info("Access verified for %s", calendar_id)
+            self._verified.set(calendar_id, True)
             return True
         except HttpError as e:
-            print(f"[CalendarClient] Access check failed for {calendar_id}: {e.resp.status}")
+            logger.warning("Access check failed for %s: %s", calendar_id, e.resp.status)
             return False
         except Exception as e:
-            print(f"[CalendarClient] Unexpected error during verification: {e}")
+            logger.error("Unexpected error during verification of %s: %s", calendar_id, e)
             return False
 
+    async def verify_access_async(self, calendar_id: str) -> bool:
+        """
+        verify_access() without blocking the event loop.
+        The Google client is synchronous, so the call runs in a worker thread.
+        """
+        if self._verified.get(calendar_id):
+            return True  # cached: no thread hop needed
+        return await asyncio.to_thread(self.verify_access, calendar_id)
+
     def create_event(self, calendar_id: str, title: str, start_iso: str, end_iso: str = None, description: str = "") -> dict:
         """
         Create an event in the user's calendar.
@@ -74,51 +234,129 @@ class CalendarClient:
             start_iso: Start time in ISO 8601 format (e.g. 2024-05-01T10:00:00)
             end_iso: Optional end time. If missing, defaults to 1 hour after start.
             description: Optional description
+        
+        Returns:
+            dict: {"ok": True, "event_id", "link"} or {"ok": False, "error"}.
+                  "duplicate": True is added when the same event was created
+                  within _CREATED_TTL_SECONDS and that one is returned instead.
         """
+        key = (calendar_id, title, start_iso, end_iso)
+        created = self._created.get(key)
+        if created is not None:
+            logger.info("Event %r for %s was just created, not inserting it again", title, calendar_id)
+            # A copy (callers may modify what we return), marked so the caller
+            # can tell the user nothing new was added
+            return {**created, "duplicate": True}
         try:
-            from datetime import datetime, timedelta
-            
-            # 1. Normalize start_iso (handle 'Z' or missing offset)
-            # If it already has an offset/Z, use it. If not, treat as naive.
-            try:
-                # This handles strings with or without 'Z'/offset
-                start_dt = datetime.fromisoformat(start_iso.replace('Z', '+00:00'))
-            except ValueError:
-                # If AI returns something slightly non-standard
-                print(f"[CalendarClient] WARNING: Could not parse ISO '{start_iso}'. Using fallback parsing.")
-                start_dt = datetime.now() + timedelta(hours=1) # Safe fallback
-
-            # 2. Handle end_iso
-            if not end_iso:
-                end_dt = start_dt + timedelta(hours=1)
-                end_iso = end_dt.isoformat()
-            else:
-                end_dt = datetime.fromisoformat(end_iso.replace('Z', '+00:00'))
-
-            # 3. Build the event with explicit Timezone (Israel)
-            # Google Calendar API requires either explicit timezone OR offset in the string.
-            # Adding 'timeZone' is the most robust way.
-            tz = "Asia/Jerusalem"
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_dt.strftime('%Y-%m-%dT%H:%M:%S'),
-                    'timeZone': tz
-                },
-                'end': {
-                    'dateTime': end_dt.strftime('%Y-%m-%dT%H:%M:%S'),
-                    'timeZone': tz
-                },
-            }
-
-            print(f"[CalendarClient] Creating event '{title}' for {calendar_id}")
-            created_event = self.service.events().insert(calendarId=calendar_id, body=event).execute()
-            return {"ok": True, "event_id": created_event.get('id'), "link": created_event.get('htmlLink')}
+            event = self._event_body(title, start_iso, end_iso, description)
+
+            logger.debug("Creating event %r for %s", title, calendar_id)
+            created_event = self.service.events().insert(calendarId=calendar_id, body=event).execute(http=self._http())
+            result = {"ok": True, "event_id": created_event.get('id'), "link": created_event.get('htmlLink')}
+            self._created.set(key, result)
+            return dict(result)
             
         except Exception as e:
-            print(f"[CalendarClient] Error creating event: {e}")
+            logger.error("Error creating event for %s: %s", calendar_id, e)
             return {"ok": False, "error": str(e)}
 
-# Singleton instance
-calendar_client = CalendarClient()
+    def _event_body(self, title: str, start_iso: str, end_iso: str = None, description: str = "") -> dict:
+        """
+        The Calendar API event resource for create_event().
+        
+        Raises:
+            ValueError: end_iso is not a valid ISO 8601 time
+        """
+        # 1. Normalize start_iso (handle 'Z' or missing offset)
+        # If it already has an offset/Z, use it. If not, treat as naive.
+        try:
+            start_dt = _parse_event_time(start_iso)
+            start_str = _event_time_str(start_iso, start_dt)
+        except ValueError:
+            # If AI returns something slightly non-standard
+            logger.warning("Could not parse ISO %r. Using fallback parsing.", start_iso)
+            start_dt = datetime.now() + _DEFAULT_EVENT_LENGTH # Safe fallback
+            start_str = start_dt.strftime(_EVENT_DT_FMT)
+
+        # 2. Handle end_iso
+        if not end_iso:
+            end_str = (start_dt + _DEFAULT_EVENT_LENGTH).strftime(_EVENT_DT_FMT)
+        else:
+            end_str = _event_time_str(end_iso, _parse_event_time(end_iso))
+
+        # 3. Build the event with explicit Timezone (Israel)
+        # Google Calendar API requires either explicit timezone OR offset in the string.
+        # Adding 'timeZone' is the most robust way.
+        return {
+            'summary': title,
+            'description': description,
+            'start': {'dateTime': start_str, 'timeZone': _EVENT_TZ},
+            'end': {'dateTime': end_str, 'timeZone': _EVENT_TZ},
+        }
+
+    async def create_event_async(self, calendar_id: str, title: str, start_iso: str, end_iso: str = None, description: str = "") -> dict:
+        """create_event() without blocking the event loop (runs in a worker thread)."""
+        return await asyncio.to_thread(self.create_event, calendar_id, title, start_iso, end_iso, description)
+
+def _parse_event_time(value: str) -> datetime:
+    """
+    datetime.fromisoformat, also accepting a trailing 'Z' (UTC) on every Python version.
+    
+    Raises:
+        ValueError: not an ISO 8601 time
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'  # only the suffix: no full-string replace
+    return datetime.fromisoformat(value)
+
+
+def _event_time_str(value: str, dt: datetime) -> str:
+    """
+    The "dateTime" value for an event time that parsed as `dt`.
+    
+    The agent normally sends exactly "YYYY-MM-DDTHH:MM:SS" - already the
+    formatted value, so it is used as-is instead of going through strftime.
+    Only an exact match counts: "2026-02-06T17:00+02" is 19 chars with a 'T'
+    as well, and must still be re-formatted.
+    """
+    if _EVENT_DT_RE.match(value):
+        return value
+    return dt.strftime(_EVENT_DT_FMT)
+
+
+# Singleton instance, built on first use (see get_calendar_client)
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_calendar_client() -> CalendarClient:
+    """
+    The shared CalendarClient, created the first time it is needed.
+    
+    Building it loads the service-account credentials and the Calendar API
+    description - slow, and it fails without credentials. Doing that lazily
+    keeps it off every import (app start, tests that never touch Calendar).
+    Double-checked lock: the worker threads that run calendar calls may ask at once.
+    If construction fails, nothing is cached and the next call tries again.
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = CalendarClient()
+    return _instance
+
+
+def start_token_refresher():
+    """
+    App startup hook: build the shared client and start its token refresh.
+    
+    Blocking (credentials, API description, first token) - run it in a thread.
+    """
+    get_calendar_client().start_token_refresh()
+
+
+def stop_token_refresher():
+    """App shutdown hook: stop the token refresh, if a client was ever built."""
+    if _instance is not None:
+        _instance.stop_token_refresh()
@@ -0,0 +1,124 @@
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add backend to path - Assuming we run from project root
+sys.path.append(os.path.abspath('backend'))
+
+from tools.agent import agent_process
+from tools.agent.agent_process import (
+    _pre_classify,
+    _intent_cache_key,
+    _parse_json_response,
+    process_text,
+)
+
+
+def test_pre_classify_obvious_inputs():
+    print("=== Testing rule-based pre-classification (matches) ===")
+    
+    cases = {
+        "note: call the plumber": "note",
+        "  Note : idea for the app": "note",
+        "פתק: לקנות מתנה לאמא": "note",
+    }
+    for text, expected in cases.items():
+        result = _pre_classify(text)
+        assert result is not None, f"{text!r} should be classified without OpenAI"
+        assert result["intent"] == expected, f"{text!r}: expected {expected}, got {result['intent']}"
+        assert result["entities"] == {}, "Rules never extract entities"
+        assert result["original_text"] == text, "Original text is echoed back"
+    
+    print("✅ Matches Verified!")
+
+
+def test_pre_classify_leaves_the_rest_to_the_llm():
+    print("=== Testing rule-based pre-classification (no match) ===")
+    
+    for text in (
+        "remind me what to buy tomorrow",   # question word, but no '?'
+        "buy milk?",                        # '?', but no question word
+        "notebook: buy a new one",          # "note" only as part of a word
+        "meeting with Dana at 5",
+        "",
+        # Question-shaped, but actionable: the LLM decides (event / reminder)
+        "when is my meeting with Dana tomorrow?",
+        "how about a reminder at 5 to call mom?",
+        "what about setting an alarm for 7?",
+        "מתי הפגישה עם דני מחר?",
+        "מה דעתך על תזכורת בחמש להתקשר לאמא?",
+    ):
+        assert _pre_classify(text) is None, f"{text!r} must go through OpenAI"
+    
+    print("✅ No-match Verified!")
+
+
+def test_cache_key_keeps_meaningful_punctuation():
+    print("=== Testing intent cache key ===")
+    
+    assert _intent_cache_key("Add milk.") == _intent_cache_key("  add   MILK "), "Case/whitespace/dots are ignored"
+    assert _intent_cache_key("buy milk?") != _intent_cache_key("buy milk"), "'?' changes the meaning"
+    assert _intent_cache_key("wake up!") != _intent_cache_key("wake up"), "'!' is kept too"
+    
+    print("✅ Cache key Verified!")
+
+
+def test_null_entities_are_dropped():
+    print("=== Testing entity coercion ===")
+    
+    result = _parse_json_response(
+        '{"intent": "reminder", "confidence": 0.9, '
+        '"entities": {"title": "call mom", "start_iso": null, "label": "", "items": ["a", null, "b"], "count": 2}}',
+        "remind me to call mom"
+    )
+    assert result["entities"] == {"title": "call mom", "items": "a, b", "count": "2"}, result["entities"]
+    
+    print("✅ Entities Verified!")
+
+
+def test_identical_texts_share_one_openai_call():
+    print("=== Testing single-flight + classification cache ===")
+    
+    calls = []
+    
+    async def fake_create(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)  # still running when the second request arrives
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+            content='{"intent": "shopping", "confidence": 0.95, "entities": {"items": "milk, eggs"}}'
+        ))])
+    
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    agent_process._INTENT_CACHE.clear()
+    
+    async def run():
+        first, second = await asyncio.gather(
+            process_text("need milk and eggs"),
+            process_text("Need milk and eggs."),
+        )
+        third = await process_text("need milk and eggs")
+        return first, second, third
+    
+    with patch('tools.agent.agent_process.get_openai_api_key', return_value="sk-test"), \
+         patch('tools.agent.agent_process._client', return_value=fake_client):
+        first, second, third = asyncio.run(run())
+    
+    assert len(calls) == 1, f"Expected ONE OpenAI call, got {len(calls)}"
+    for result in (first, second, third):
+        assert result["intent"] == "shopping" and result["entities"] == {"items": "milk, eggs"}
+    assert second["original_text"] == "Need milk and eggs.", "Each caller gets its own text back"
+    assert first["entities"] is not second["entities"], "Callers never share a mutable dict"
+    assert not agent_process._IN_FLIGHT, "Finished calls are removed from the in-flight map"
+    
+    agent_process._INTENT_CACHE.clear()
+    print("✅ Single-flight Verified!")
+
+
+if __name__ == "__main__":
+    test_pre_classify_obvious_inputs()
+    test_pre_classify_leaves_the_rest_to_the_llm()
+    test_cache_key_keeps_meaningful_punctuation()
+    test_null_entities_are_dropped()
+    test_identical_texts_share_one_openai_call()
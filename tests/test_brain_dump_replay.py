@@ -0,0 +1,72 @@
+import sys
+import os
+from unittest.mock import patch, AsyncMock
+
+# Add backend to path - Assuming we run from project root
+sys.path.append(os.path.abspath('backend'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints import brainDump
+from endpoints.brainDump import router
+
+USER = {"user_id": "0501234567", "device_id": "Dana_iPhone", "calendar_enabled": True}
+NOTE_REPLY = {"status": "SUCCESS", "intent": "note", "message": "buy a gift for mom (10:00)"}
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_retried_post_without_header_is_replayed():
+    print("=== Testing /brain-dump retry replay ===")
+    
+    brainDump._RECENT_REPLIES.clear()
+    flow = AsyncMock(return_value=NOTE_REPLY)
+    payload = {"text": "note: buy a gift for mom", "user_id": "Dana_iPhone"}
+    
+    with patch('endpoints.brainDump.get_user_by_device', AsyncMock(return_value=USER)), \
+         patch('endpoints.brainDump.brain_dump_flow', flow):
+        client = _client()
+        first = client.post("/brain-dump", json=payload)
+        retry = client.post("/brain-dump", json=payload)  # plain retry: no extra headers
+    
+    assert first.status_code == retry.status_code == 200
+    assert retry.content == first.content, "The retry gets the exact same reply"
+    assert flow.await_count == 1, f"The flow must run ONCE, ran {flow.await_count} times"
+    
+    brainDump._RECENT_REPLIES.clear()
+    print("✅ Replay Verified!")
+
+
+def test_replay_needs_a_registered_user_and_same_text():
+    print("=== Testing /brain-dump replay boundaries ===")
+    
+    brainDump._RECENT_REPLIES.clear()
+    flow = AsyncMock(return_value=NOTE_REPLY)
+    lookup = AsyncMock(return_value=USER)
+    
+    with patch('endpoints.brainDump.get_user_by_device', lookup), \
+         patch('endpoints.brainDump.brain_dump_flow', flow):
+        client = _client()
+        client.post("/brain-dump", json={"text": "note: buy a gift for mom", "user_id": "Dana_iPhone"})
+        client.post("/brain-dump", json={"text": "note: buy flowers", "user_id": "Dana_iPhone"})
+        assert flow.await_count == 2, "A different text is a new dump"
+        
+        # Device unregistered meanwhile: no replayed success, it is asked to register
+        lookup.return_value = None
+        reply = client.post("/brain-dump", json={"text": "note: buy a gift for mom", "user_id": "Dana_iPhone"})
+    
+    assert reply.json()["status"] == "NEEDS_REGISTRATION", reply.json()
+    assert flow.await_count == 2, "Nothing ran for the unregistered device"
+    
+    brainDump._RECENT_REPLIES.clear()
+    print("✅ Boundaries Verified!")
+
+
+if __name__ == "__main__":
+    test_retried_post_without_header_is_replayed()
+    test_replay_needs_a_registered_user_and_same_text()
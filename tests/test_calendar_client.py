@@ -0,0 +1,93 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add backend to path - Assuming we run from project root
+sys.path.append(os.path.abspath('backend'))
+
+from tools.cache.ttl_cache import TTLCache
+from tools.google_calendar.calendar_client import CalendarClient, _CREATED_TTL_SECONDS
+
+
+class FakeService:
+    """Stands in for the Calendar API service object: counts inserts."""
+    
+    def __init__(self):
+        self.inserted = []
+    
+    def events(self):
+        return self
+    
+    def insert(self, calendarId, body):
+        self.inserted.append(body)
+        self.pending = f"evt-{len(self.inserted)}"
+        return self
+    
+    def execute(self, http=None):
+        return {"id": self.pending, "htmlLink": f"https://cal/{self.pending}"}
+
+
+def _client(service):
+    """A CalendarClient without credentials or network - only what create_event uses."""
+    client = CalendarClient.__new__(CalendarClient)
+    client.service = service
+    client._created = TTLCache(maxsize=100, ttl=_CREATED_TTL_SECONDS)
+    client._http = lambda: None
+    return client
+
+
+def test_retry_gets_the_same_event_marked_duplicate():
+    print("=== Testing create_event retry dedupe ===")
+    
+    service = FakeService()
+    client = _client(service)
+    
+    with patch('tools.cache.ttl_cache.time.monotonic', return_value=1000.0):
+        first = client.create_event("dana@example.com", "Dentist", "2026-02-06T11:00:00")
+        retry = client.create_event("dana@example.com", "Dentist", "2026-02-06T11:00:00")
+    
+    assert first == {"ok": True, "event_id": "evt-1", "link": "https://cal/evt-1"}, first
+    assert "duplicate" not in first, "A real insert is not marked"
+    assert retry == {**first, "duplicate": True}, "The retry gets the same event, marked as a duplicate"
+    assert len(service.inserted) == 1, "Only ONE insert reached Google"
+    
+    print("✅ Retry dedupe Verified!")
+
+
+def test_same_event_after_the_retry_window_is_created_again():
+    print("=== Testing create_event intentional repeat ===")
+    
+    service = FakeService()
+    client = _client(service)
+    
+    with patch('tools.cache.ttl_cache.time.monotonic', return_value=1000.0) as clock:
+        client.create_event("dana@example.com", "Dentist", "2026-02-06T11:00:00")
+        
+        # e.g. the user deleted it and dictated it again
+        clock.return_value = 1000.0 + _CREATED_TTL_SECONDS + 1
+        again = client.create_event("dana@example.com", "Dentist", "2026-02-06T11:00:00")
+    
+    assert _CREATED_TTL_SECONDS <= 60, "Dedupe only covers a retry window"
+    assert again["ok"] and "duplicate" not in again, again
+    assert len(service.inserted) == 2, "The repeat is a real second insert"
+    
+    print("✅ Repeat Verified!")
+
+
+def test_different_event_is_not_deduped():
+    print("=== Testing create_event different events ===")
+    
+    service = FakeService()
+    client = _client(service)
+    client.create_event("dana@example.com", "Dentist", "2026-02-06T11:00:00")
+    other = client.create_event("dana@example.com", "Dentist", "2026-02-06T12:00:00")
+    
+    assert "duplicate" not in other and len(service.inserted) == 2, "Another time is another event"
+    
+    print("✅ Different events Verified!")
+
+
+if __name__ == "__main__":
+    test_retry_gets_the_same_event_marked_duplicate()
+    test_same_event_after_the_retry_window_is_created_again()
+    test_different_event_is_not_deduped()
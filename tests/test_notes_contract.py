@@ -1,4 +1,5 @@
 
+import asyncio
 import sys
 import os
 from unittest.mock import patch, MagicMock
@@ -24,11 +25,11 @@ def test_notes_contract():
         "original_text": original_text
     }
     
-    # Patch agent_process.process_text so we don't hit OpenAI
-    with patch('tools.agent.agent_process.process_text', return_value=mock_agent_result) as mock_process:
+    # Patch process_text (as imported by the flow) so we don't hit OpenAI
+    with patch('tools.business_logic.brain_dump_flow.process_text', return_value=mock_agent_result) as mock_process:
         
         # Run the flow
-        result = brain_dump_flow(original_text, user_id)
+        result = asyncio.run(brain_dump_flow(original_text, user_id))
         
         print(f"\nResult received: {result}")
         
@@ -0,0 +1,66 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add backend to path - Assuming we run from project root
+sys.path.append(os.path.abspath('backend'))
+
+from tools.cache.ttl_cache import TTLCache
+
+
+def test_entries_expire_after_ttl():
+    print("=== Testing TTL expiry ===")
+    
+    with patch('tools.cache.ttl_cache.time.monotonic', return_value=1000.0) as clock:
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("device", {"user_id": "0501234567"})
+        
+        clock.return_value = 1059.0
+        assert cache.get("device") == {"user_id": "0501234567"}, "Entry must live for the whole TTL"
+        
+        clock.return_value = 1061.0
+        assert cache.get("device") is None, "Entry must be gone after the TTL"
+        assert cache.get("device", "missing") == "missing", "Expired entry returns the default"
+        assert len(cache) == 0, "Expired entry is dropped on read"
+    
+    print("✅ Expiry Verified!")
+
+
+def test_pop_invalidates():
+    print("=== Testing invalidation ===")
+    
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("device", "old row")
+    
+    assert cache.pop("device") == "old row", "pop returns the removed value"
+    assert cache.get("device") is None, "A popped key must not be served again"
+    assert cache.pop("device", "nothing") == "nothing", "Popping a missing key returns the default"
+    
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.clear()
+    assert len(cache) == 0, "clear empties the cache"
+    
+    print("✅ Invalidation Verified!")
+
+
+def test_least_recently_used_is_evicted():
+    print("=== Testing LRU eviction ===")
+    
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")      # "a" is now the most recently used
+    cache.set("c", 3)   # over maxsize -> "b" goes
+    
+    assert cache.get("b") is None, "Least recently used entry must be evicted"
+    assert cache.get("a") == 1 and cache.get("c") == 3, "Recently used entries stay"
+    assert len(cache) == 2, "Size never exceeds maxsize"
+    
+    print("✅ Eviction Verified!")
+
+
+if __name__ == "__main__":
+    test_entries_expire_after_ttl()
+    test_pop_invalidates()
+    test_least_recently_used_is_evicted()